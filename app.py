@@ -1,14 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import atexit
+from array import array
+import bisect
+import dataclasses
+import gzip
+import hashlib
+import heapq
 import io
+import itertools
 import os
+import pickle
+from contextlib import closing
+import queue
 import re
+import socket
+import string
+import sqlite3
 import threading
 import time
-from datetime import datetime, date, timedelta
+from datetime import datetime, time as dtime, timedelta, timezone
 import pytz
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Iterator, Mapping, Optional, Tuple
 
 from dateutil import parser as dtparser
 from dateutil.tz import gettz
@@ -19,12 +34,17 @@ from flask import (
 
 from unidecode import unidecode
 import pandas as pd
+from openpyxl import load_workbook
 
 from dotenv import load_dotenv
+try:
+    import brotli  # optional: br encoding when installed, gzip otherwise
+except ImportError:
+    brotli = None
 from werkzeug.utils import secure_filename
 
 from pathlib import Path
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from flask import g
 import json
 
@@ -32,9 +52,6 @@ import json
 load_dotenv()
 
 
-# ROLES will be populated dynamically from CHRONOGRAMME after loading
-ROLES: List[str] = []
-
 PMS = os.environ.get("PMS_FILE", os.path.join("Sample", "pms.xlsx"))
 CHRONOGRAMME = os.environ.get("CHRONOGRAMME_FILE", os.path.join("Sample", "chronogramme.xlsx"))
 ADMIN_PASSWORD     = os.environ.get("ADMIN_PASSWORD", "changeme_admin")
@@ -42,30 +59,292 @@ ANIMATOR_PASSWORD  = os.environ.get("ANIMATOR_PASSWORD", "changeme_animator")
 OBSERVER_PASSWORD  = os.environ.get("OBSERVER_PASSWORD", "changeme_observer")
 APP_ID             = os.environ.get("APP_ID", "REMPAR-DEMO-LOCAL")
 TRACKING           = os.environ.get("TRACKING", "")
-DEBUG           = os.environ.get("DEBUG", "False")
+DEBUG           = os.environ.get("DEBUG", "false").strip().lower() in ("1", "true", "yes", "on")
 ENABLE_PMS = os.environ.get("ENABLE_PMS", "false").strip().lower() in ("1", "true", "yes", "on")
 TZ = os.getenv("TZ", "Europe/Paris")
 APP_TZ = gettz(TZ)
 
 UPLOAD_FOLDER = os.path.join("static", "images")
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+SCENARIO_EXTENSIONS = (".xlsx", ".xls", ".csv")
 
 DEMO = os.environ.get("DEMO", "false").strip().lower() in ("1", "true", "yes", "on")
 
+# Parsed scenarios are cached here (keyed by workbook hash) so boots and identical
+# re-uploads skip openpyxl; empty disables the cache
+SCENARIO_CACHE_DIR = os.environ.get("SCENARIO_CACHE_DIR", "cache").strip()
+
+# Poll CHRONOGRAMME_FILE/PMS_FILE every N seconds and hot-reload them when saved; 0 disables
+SCENARIO_WATCH_INTERVAL = float(os.environ.get("SCENARIO_WATCH_INTERVAL", "0") or 0)
+
+# Poll i18n/*.json every N seconds and recompile the translations when edited; 0 disables
+I18N_WATCH_INTERVAL = float(os.environ.get("I18N_WATCH_INTERVAL", "0") or 0)
+
+# Append-only SQLite journal of loads, deliveries and countdowns; a restart resumes
+# from it without re-parsing the workbooks. Empty disables the journal
+JOURNAL_FILE = os.environ.get("JOURNAL_FILE", "").strip()
+JOURNAL_FLUSH_INTERVAL = 0.2  # seconds between batched commits
+
+# Pub/sub backend sharing scenario loads between workers: "memory" (single process) or "redis"
+PUBSUB_BACKEND = os.environ.get("PUBSUB_BACKEND", "memory").strip().lower()
+PUBSUB_URL = os.environ.get("PUBSUB_URL", "redis://localhost:6379/0")
+
+# SSE streams: keepalive comment every N seconds (detects closed sockets on idle streams, 0 = off),
+# per-connection notification buffer and what to do with a slow client ("drop":
+# coalesce with the pending notification of the same kind, at most one per kind;
+# "disconnect": end the response once the buffer is full, the browser reconnects
+# with its Last-Event-ID)
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", "15") or 15)
+STREAM_QUEUE_MAX = int(os.environ.get("STREAM_QUEUE_MAX", "64") or 64)
+STREAM_OVERFLOW = os.environ.get("STREAM_OVERFLOW", "drop").strip().lower()
+# Concurrent SSE connections allowed per client IP and in total; 0 = unlimited
+STREAM_MAX_PER_IP = int(os.environ.get("STREAM_MAX_PER_IP", "0") or 0)
+STREAM_MAX_TOTAL = int(os.environ.get("STREAM_MAX_TOTAL", "0") or 0)
+
+# Exercise start, the anchor of every horaire: time-only cells fall on its day, "J+1 08:00"
+# on the next one and "T+01:30" counts from it. "YYYY-MM-DD" (midnight) or "YYYY-MM-DD HH:MM";
+# empty = midnight of the day the app starts (fixed for the life of the process)
+EXERCISE_START = os.environ.get("EXERCISE_START", "").strip()
+
+# Scenario clock at boot, for dry runs: playback speed (60 = one scenario hour per minute)
+# and the scenario time to start from (any horaire: "HH:MM[:SS]", "T+00:00", an ISO datetime); empty = real time.
+# Both can be changed live from /admin
+CLOCK_SPEED = float(os.environ.get("CLOCK_SPEED", "1") or 1)
+CLOCK_START = os.environ.get("CLOCK_START", "").strip()
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET", "dev-secret-change-me")
 
-STATE_LOCK = threading.Lock()
-TWEETS: List[Dict[str, Any]] = []
-MESSAGES: List[Dict[str, Any]] = []
-SENT_TWEET_IDS: set[str] = set()
-SENT_MESSAGE_IDS: set[str] = set()
-RAW_ROWS: List[Dict[str, Any]] = []
+# --- Metrics: in-process counters/gauges/histograms, Prometheus text format on /metrics ---
+METRICS: List["Metric"] = []
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Metric:
+    """
+    One metric family. Samples are keyed by the tuple of label values; a
+    small lock per family keeps the hot path to a dict update.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, Any] = {}
+        METRICS.append(self)
+
+    def _labels(self, key: tuple, extra: tuple = ()) -> str:
+        pairs = list(zip(self.labels, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{self._labels(key)} {value}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        """Decrement; a series back at 0 is dropped so transient labels don't pile up."""
+        with self._lock:
+            value = self._values.get(labels, 0) - amount
+            if value:
+                self._values[labels] = value
+            else:
+                self._values.pop(labels, None)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = ()):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]  # buckets, +Inf, sum
+            counts[i] += 1
+            counts[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        for key, counts in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+STREAMS_OPEN = Gauge("murail_streams_open", "Open SSE connections.", ("endpoint", "role"))
+SSE_EVENTS = Counter("murail_sse_events_total", "SSE events written.", ("event",))
+SSE_BYTES = Counter("murail_sse_bytes_total", "SSE bytes written.", ("endpoint",))
+DELIVERY_LAG = Histogram("murail_delivery_lag_seconds",
+                         "Real delay between an item's scheduled time and its push to a live stream.",
+                         ("timeline",), (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+STATE_LOCK_WAIT = Histogram("murail_state_lock_wait_seconds", "Time waiting on STATE_LOCK to publish a scenario.",
+                            (), (1e-5, 1e-4, 1e-3, .01, .1, 1))
+LOAD_SECONDS = Histogram("murail_load_seconds", "Scenario load time per stage (parse, apply).",
+                         ("channel", "stage"), (.01, .05, .1, .25, .5, 1, 2.5, 5, 10, 30))
+
+STREAMS_REJECTED = Counter("murail_streams_rejected_total", "SSE connections refused by a cap.", ("reason",))
+STREAM_OVERFLOWS = Counter("murail_stream_overflows_total", "Notifications merged into a pending one (drop) or hitting a full stream buffer (disconnect).", ("policy",))
+
+def count_frames(endpoint: str, frames: List[bytes]) -> None:
+    """Account SSE frames about to be written (one bytes counter update per batch)."""
+    size = 0
+    for frame in frames:
+        size += len(frame)
+        if frame.startswith(b"event: "):
+            SSE_EVENTS.inc(frame[7:frame.index(b"\n")].decode("ascii"))
+    if size:
+        SSE_BYTES.inc(endpoint, amount=size)
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Inject:
+    """
+    One chronogramme message with every column the pages and streams use,
+    animator notes included, in a single slotted record.
+    """
+    id: str
+    at_ms: int              # epoch milliseconds, see parse_horaire_column
+    emetteur: str
+    destinataire: str
+    stimuli: str
+    reaction: str = ""      # "reaction attendue" column
+    commentaire: str = ""
+    livrable: str = ""
+
+    @property
+    def at(self) -> datetime:
+        return _ms_datetime(self.at_ms)
 
-# NEW: store parsed "decompte" windows
-DECOMPTE_EVENTS: List[Dict[str, Any]] = []  # {start: datetime, end: datetime, minutes: int}
+
+def _ms_timeline() -> array:
+    return array("q")
+
+
+@dataclasses.dataclass(frozen=True)
+class Scenario:
+    """
+    Immutable snapshot of the loaded exercise. Loaders build the new fields
+    aside and publish them with a single reference swap (publish_scenario), so
+    readers grab SCENARIO once, never lock, and a reload never stalls a stream.
+    Tweets are plain dicts and messages Inject records, both shared
+    read-only between snapshots.
+
+    Due times are int64 epoch milliseconds in array('q') columns, so every
+    bisect against the clock (CLOCK.now_ms()) is an integer compare.
+    """
+    tweets: tuple = ()
+    # due times (epoch ms) parallel to tweets, sorted, for bisect
+    tweet_ats: array = dataclasses.field(default_factory=_ms_timeline)
+    tweet_json: tuple = ()      # pre-serialized stream item of each tweet
+    tweet_version: int = 0      # content version of the load; part of the SSE event ids
+    tweet_changes: tuple = ()   # incremental reload chain, see publish_scenario
+    messages: tuple = ()
+    message_ats: array = dataclasses.field(default_factory=_ms_timeline)
+    message_json: tuple = ()
+    animateur_json: tuple = ()
+    # role -> sorted positions in messages addressed to it ("tous" broadcasts merged in)
+    role_index: Mapping[str, tuple] = dataclasses.field(default_factory=lambda: MappingProxyType({}))
+    broadcast_index: tuple = ()  # positions of "tous" messages, for roles with no own message
+    roles: tuple = ()            # populated dynamically from CHRONOGRAMME after loading
+    message_version: int = 0
+    message_changes: tuple = ()
+    # message id -> positions in messages, to locate the items of a diff
+    message_id_index: Mapping[str, tuple] = dataclasses.field(default_factory=lambda: MappingProxyType({}))
+    decompte_events: tuple = ()  # {start_ms: int, end_ms: int, minutes: int}
+    # decompte windows compiled into disjoint segments: [bounds[i], bounds[i+1])
+    # shows the countdown to ends[i] (epoch ms, None: no countdown); see compile_decompte_windows
+    decompte_bounds: array = dataclasses.field(default_factory=_ms_timeline)
+    decompte_ends: tuple = ()
+    anchor: str = ""             # ISO exercise anchor the chronogramme was resolved against
+
+    # --- Page views: derived on first use, cached on the snapshot until the next reload ---
+    @cached_property
+    def message_meta(self) -> Mapping[str, Dict[str, str]]:
+        """Animator notes (reaction/commentaire) of each message id."""
+        return MappingProxyType({m.id: {"reaction": m.reaction, "commentaire": m.commentaire}
+                                 for m in self.messages})
+
+    @cached_property
+    def message_views(self) -> tuple:
+        """Messages packed as the animateur/observateur pages consume them."""
+        return tuple(_message_view(m) for m in self.messages)
+
+    @cached_property
+    def message_events(self) -> tuple:
+        """Message rows of the index/admin timelines, parallel to message_ats."""
+        return tuple({"at": m.at, "at_ms": m.at_ms, "type": "message", "label": _message_label(m)}
+                     for m in self.messages)
+
+    @cached_property
+    def admin_timeline(self) -> tuple:
+        """(ats, events): tweets and messages merged in time order for /admin."""
+        events = [{"at": _ms_datetime(t["at_ms"]), "at_ms": t["at_ms"], "type": "tweet",
+                   "label": f"Tweet de {t['emetteur']}"} for t in self.tweets]
+        events = sorted(events + list(self.message_events), key=lambda e: e["at_ms"])
+        return array("q", (e["at_ms"] for e in events)), tuple(events)
+
+
+SCENARIO = Scenario()
+STATE_LOCK = threading.Lock()  # serializes writers only; readers use the SCENARIO reference
+
+CHANGES_KEPT = 16  # incremental reloads a live stream can catch up on
+
+def publish_scenario(timeline: str, changes: Optional[tuple] = None,
+                     version: Optional[int] = None, **fields) -> Scenario:
+    """
+    Swap in a new snapshot with `fields` replaced and the version of `timeline`
+    ("tweet" or "message") set to `version`. Loads pass the content version
+    of their payload (see content_version), so every worker publishing the
+    same upload, and a restart restoring it, ends up on the same version and
+    the clients' Last-Event-IDs stay valid. Versions are only ever compared
+    for equality; without one, the version is bumped from the ms clock.
+
+    `changes` = (base version, changed ids, removed ids) describes an
+    incremental reload against the snapshot of version `base`. It is chained
+    in `{timeline}_changes` so live streams push only those items. Without
+    it, or when another load got published in between, the chain restarts
+    and streams resend their whole history.
+    """
+    global SCENARIO
+    t0 = time.perf_counter()
+    with STATE_LOCK:
+        STATE_LOCK_WAIT.observe(time.perf_counter() - t0)
+        version_field = f"{timeline}_version"
+        current = getattr(SCENARIO, version_field)
+        chain: tuple = ()
+        if changes is not None and changes[0] == current:
+            chain = (getattr(SCENARIO, f"{timeline}_changes") + (changes,))[-CHANGES_KEPT:]
+        fields[f"{timeline}_changes"] = chain
+        fields[version_field] = version or max(current + 1, int(time.time() * 1000))
+        SCENARIO = dataclasses.replace(SCENARIO, **fields)
+        return SCENARIO
 
 I18N_DIR = Path(__file__).parent / "i18n"
 SUPPORTED_LANGS = {"fr", "en"}
@@ -83,40 +362,88 @@ def get_lang() -> str:
         return lang
     return detect_lang_from_header()
 
-# --- File loading with mtime-aware cache (auto reloads when files change) ---
-@lru_cache(maxsize=None)
-def _read_translation(lang: str, mtime: float) -> dict:
-    path = I18N_DIR / f"{lang}.json"
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
-
-def load_translation(lang: str) -> dict:
-    lang = lang if lang in SUPPORTED_LANGS else DEFAULT_LANG
-    path = I18N_DIR / f"{lang}.json"
-    if not path.exists():
-        lang = DEFAULT_LANG
-    path = I18N_DIR / f"{lang}.json"
-    mtime = path.stat().st_mtime
-    return _read_translation(lang, mtime)
+# --- Translations: compiled once into immutable tables, swapped on reload ---
+@dataclasses.dataclass(frozen=True, slots=True)
+class Translation:
+    """One language: raw texts, plus pre-bound formatters for those with placeholders."""
+    texts: Mapping[str, str]
+    formats: Mapping[str, Any]
+
+_EMPTY_TRANSLATION = Translation(MappingProxyType({}), MappingProxyType({}))
+_FORMATTER = string.Formatter()
+
+def _compile_translation(data: dict) -> Translation:
+    texts, formats = {}, {}
+    for key, text in data.items():
+        texts[key] = text = str(text)
+        if "{" not in text:
+            continue
+        try:
+            if any(field is not None for _, field, _, _ in _FORMATTER.parse(text)):
+                formats[key] = text.format
+        except ValueError:
+            pass  # malformed template: t() returns the raw text
+    return Translation(MappingProxyType(texts), MappingProxyType(formats))
+
+def compile_translations() -> Mapping[str, Translation]:
+    """Read and compile i18n/<lang>.json for every supported language."""
+    tables = {}
+    for lang in sorted(SUPPORTED_LANGS):
+        path = I18N_DIR / f"{lang}.json"
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                tables[lang] = _compile_translation(json.load(f))
+        except (OSError, ValueError) as e:
+            app.logger.warning(f"Traductions {path} illisibles: {e}")
+    return MappingProxyType(tables)
+
+TRANSLATIONS = compile_translations()
+
+def get_translation(lang: str) -> Translation:
+    return TRANSLATIONS.get(lang) or TRANSLATIONS.get(DEFAULT_LANG) or _EMPTY_TRANSLATION
+
+def watch_translations(interval: float) -> threading.Thread:
+    """Recompile TRANSLATIONS whenever an i18n/*.json file changes on disk."""
+    def stamps() -> dict:
+        return {lang: _file_stamp(str(I18N_DIR / f"{lang}.json")) for lang in SUPPORTED_LANGS}
+
+    def run() -> None:
+        global TRANSLATIONS
+        seen = stamps()
+        while True:
+            time.sleep(interval)
+            current = stamps()
+            if current != seen:
+                seen = current
+                TRANSLATIONS = compile_translations()
+                app.logger.info("Traductions rechargées")
+
+    thread = threading.Thread(target=run, name="i18n-watch", daemon=True)
+    thread.start()
+    return thread
 
 @app.before_request
 def before_request():
     g.lang = get_lang()
-    g.tdict = load_translation(g.lang)
+    g.translation = get_translation(g.lang)
+
+def t(key: str, **kwargs) -> str:
+    """Translated text of `key` for the current request (the key itself if unknown)."""
+    table = g.translation
+    if kwargs:
+        fmt = table.formats.get(key)
+        if fmt is not None:
+            try:
+                return fmt(**kwargs)
+            except Exception:
+                pass  # don't crash on bad placeholders
+    return table.texts.get(key, key)
+
+app.jinja_env.globals.update(t=t, current_lang=lambda: g.lang)
 
 @app.context_processor
 def inject_translator():
-    def t(key: str, **kwargs):
-        text = g.tdict.get(key, key)
-        try:
-            return text.format(**kwargs) if kwargs else text
-        except Exception:
-            return text  # don't crash on bad placeholders
-    return {
-        "t": t,
-        "current_lang": lambda: g.lang,
-        "now_year": datetime.now().year
-    }
+    return {"now_year": datetime.now().year}
 
 @app.route("/set-lang/<lang>")
 def set_lang(lang):
@@ -132,28 +459,122 @@ def set_lang(lang):
 
 
 
+# --- HTTP caching policy: hashed static assets, revalidated files, compressed bodies ---
+STATIC_IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESS_MIN_SIZE = 1024  # bytes; smaller bodies are not worth a Content-Encoding
+COMPRESS_MIMETYPES = {"text/html", "application/json", "text/plain", "text/css", "application/javascript"}
+
+@lru_cache(maxsize=None)
+def _static_digest(path: str, mtime_ns: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+def _static_version(filename: str) -> Optional[str]:
+    """Content hash of a file under /static (None if missing)."""
+    path = os.path.join(app.static_folder, filename)
+    try:
+        return _static_digest(path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+def static_url(filename: str) -> str:
+    """URL of a static file carrying its content hash, so browsers can keep it for good."""
+    version = _static_version(filename)
+    if version is None:
+        return url_for("static", filename=filename)
+    return url_for("static", filename=filename, v=version)
+
 # Make TZ available in all templates
 @app.context_processor
 def inject_globals():
-    return dict(TZ=TZ)
+    return dict(TZ=TZ, static_url=static_url)
+
+def _compress(response) -> None:
+    """gzip (or brotli) text bodies the client accepts; files and streams are left alone."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        encoding, body = "br", brotli.compress(data, quality=5)
+    elif accepted["gzip"]:
+        encoding, body = "gzip", gzip.compress(data, compresslevel=6)
+    else:
+        return
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # The compressed body is another representation: keep If-None-Match working
+    # (weak comparison) without claiming byte-identity
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
 
 @app.after_request
-def add_no_cache_headers(response):
-    """Add no-cache headers to all responses."""
-    response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
+def apply_http_policy(response):
+    """
+    Caching policy, then compression:
+      - /static?v=<content hash> (see static_url): cached for a year, immutable
+      - other /static files: revalidated through their ETag/Last-Modified (304)
+      - responses setting their own Cache-Control (e.g. /messages) keep it
+      - everything else is dynamic and gets no-store
+    """
+    if request.endpoint == "static":
+        filename = (request.view_args or {}).get("filename", "")
+        version = request.args.get("v")
+        immutable = response.status_code == 200 and version and version == _static_version(filename)
+        response.headers["Cache-Control"] = STATIC_IMMUTABLE if immutable else "no-cache"
+    elif "Cache-Control" not in response.headers:
+        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
+        response.headers["Pragma"] = "no-cache"
+        response.headers["Expires"] = "0"
+    _compress(response)
     return response
 
+def compile_decompte_windows(events) -> tuple:
+    """
+    Compile decompte windows (sorted by start) into (bounds, ends): sorted
+    transition times and, for each segment starting there, the end of the
+    countdown then shown (the earliest-started active window) or None, all in
+    epoch ms. Adjacent segments showing the same countdown are merged, so
+    every bound is a real transition.
+
+    One sweep over the transition points: windows are pushed on a heap keyed
+    by (start, position) as they open, and the ones already ended are popped
+    when they reach the top, which is then the countdown shown.
+    """
+    points = sorted({ev[k] for ev in events for k in ("start_ms", "end_ms")})
+    starts = sorted((ev["start_ms"], i, ev["end_ms"]) for i, ev in enumerate(events))
+    active: List[tuple] = []
+    bounds = array("q")
+    ends: List[Optional[int]] = []
+    j = 0
+    for ts in points:
+        while j < len(starts) and starts[j][0] <= ts:
+            heapq.heappush(active, starts[j])
+            j += 1
+        while active and active[0][2] <= ts:
+            heapq.heappop(active)
+        end = active[0][2] if active else None
+        if (ends[-1] if ends else None) != end:
+            bounds.append(ts)
+            ends.append(end)
+    return bounds, tuple(ends)
+
 def get_active_decompte_end(now: Optional[datetime] = None) -> Optional[datetime]:
-    """If a decompte is active (start <= now < end) return its end datetime, else None."""
-    if now is None:
-        now = datetime.now(tz=APP_TZ)
-    with STATE_LOCK:
-        for ev in DECOMPTE_EVENTS:
-            if ev["start"] <= now < ev["end"]:
-                return ev["end"]
-    return None
+    """If a decompte is active (start <= now < end, scenario time) return its end datetime, else None."""
+    end = _active_decompte_end_ms(_epoch_ms(now) if now else CLOCK.now_ms())
+    return _ms_datetime(end) if end is not None else None
+
+def _active_decompte_end_ms(ts: int) -> Optional[int]:
+    sc = SCENARIO
+    i = bisect.bisect_right(sc.decompte_bounds, ts) - 1
+    return sc.decompte_ends[i] if i >= 0 else None
 
 # --- NEW: small helper to format the SSE event for current décompte state
 def _sse_decompte_event():
@@ -164,7 +585,7 @@ def _sse_decompte_event():
     """
     end_dt = get_active_decompte_end()
     if end_dt:
-        payload = app.json.dumps({"target_iso": end_dt.astimezone(APP_TZ).isoformat()})
+        payload = app.json.dumps({"target_iso": end_dt.isoformat()})
         return ("decompte", payload)
     else:
         return ("decompte_end", app.json.dumps({}))
@@ -174,24 +595,71 @@ def norm(s: Optional[str]) -> str:
         return ""
     return unidecode(str(s)).strip()
 
-def parse_horaire(val) -> datetime:
+# --- Scenario timeline: horaires resolved against the exercise start, as epoch ms ---
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS = timedelta(milliseconds=1)
+
+def _epoch_ms(dt: datetime) -> int:
+    return (dt - _EPOCH) // _MS
+
+def _ms_datetime(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=APP_TZ)
+
+def _configured_anchor() -> Optional[datetime]:
+    """EXERCISE_START as an aware datetime in APP_TZ, or None when unset (or invalid)."""
+    if EXERCISE_START:
+        try:
+            dt = dtparser.isoparse(EXERCISE_START)
+            return dt.astimezone(APP_TZ) if dt.tzinfo else dt.replace(tzinfo=APP_TZ)
+        except ValueError as e:
+            app.logger.warning(f"EXERCISE_START invalide '{EXERCISE_START}': {e}; jour courant utilisé")
+    return None
+
+EXERCISE_ANCHOR = _configured_anchor()
+
+def exercise_anchor() -> datetime:
+    """
+    The anchor a load resolves its horaires against: EXERCISE_START when set,
+    else midnight of the current day in APP_TZ. Resolved per load, so a
+    long-running process picks up the day of each upload; the parsed scenario
+    keeps the anchor it was resolved with.
+    """
+    if EXERCISE_ANCHOR is not None:
+        return EXERCISE_ANCHOR
+    return datetime.combine(datetime.now(tz=APP_TZ).date(), dtime(), tzinfo=APP_TZ)
+
+_CLOCK_RE = r"\d{1,2}:\d{2}(?::\d{2})?"
+# "T+01:30" (from the exercise start; T-00:15 before it) and "J+1 08:00" / "D+1 08:00" (day after)
+_RELATIVE_RE = rf"[Tt]\s*([+-])\s*({_CLOCK_RE})"
+_DAY_RE = rf"[JjDd]\s*\+\s*(\d+)(?:\s+({_CLOCK_RE}))?"
+
+def _clock_delta(clock: str) -> timedelta:
+    h, m, *sec = (int(part) for part in clock.split(":"))
+    return timedelta(hours=h, minutes=m, seconds=sec[0] if sec else 0)
+
+def parse_horaire(val, anchor: Optional[datetime] = None) -> datetime:
     """
     Parse an Excel 'horaire' cell into a timezone-aware datetime in APP_TZ.
 
     Accepts:
       - strings like "HH:MM", "HH:MM:SS", "02:15:00 PM"
+      - "T+HH:MM[:SS]" from the exercise start and "J+n [HH:MM[:SS]]" (or "D+n")
+        for a time n days after the exercise day
       - pandas/py datetime objects
       - Excel serial numbers (including time-only fractions)
-    For time-only inputs, the date defaults to today (local).
+    For time-only inputs, the date is the day of `anchor` (exercise_anchor()
+    by default).
     """
-    today = date.today()
-    default_dt = datetime.combine(today, datetime.min.time())
+    anchor = anchor or exercise_anchor()
+    default_dt = datetime.combine(anchor.date(), datetime.min.time())
 
     # 1) Pandas/py datetime-like
     if isinstance(val, (datetime, pd.Timestamp)):
         dt = pd.to_datetime(val).to_pydatetime()
 
     # 2) Excel serials (date+time as days since 1899-12-30; time-only as fraction of a day)
+    elif isinstance(val, (int, float)) and not pd.isna(val) and 0 <= val < 1:
+        dt = default_dt + timedelta(seconds=int(round(float(val) * 86400)))
     elif isinstance(val, (int, float)) and not pd.isna(val):
         try:
             # This handles both whole days and fractions (time-only)
@@ -201,12 +669,23 @@ def parse_horaire(val) -> datetime:
             secs = int(round(float(val) * 86400)) % 86400
             dt = default_dt + timedelta(seconds=secs)
 
-    # 3) Strings (HH:MM, HH:MM:SS, with/without AM/PM, etc.)
+    # 3) Strings (HH:MM, HH:MM:SS, with/without AM/PM, T+/J+ notations, etc.)
     else:
         txt = str(val).strip()
         if not txt:
             raise ValueError("horaire manquant")
 
+        relative = re.fullmatch(_RELATIVE_RE, txt)
+        if relative:
+            offset = _clock_delta(relative.group(2)) // _MS
+            return _ms_datetime(_epoch_ms(anchor) + (offset if relative.group(1) == "+" else -offset))
+        day = re.fullmatch(_DAY_RE, txt)
+        if day:
+            offset = _clock_delta(day.group(2) or "0:00")
+            if offset >= timedelta(days=1):
+                raise ValueError(f"heure invalide: {txt}")
+            return (default_dt + timedelta(days=int(day.group(1))) + offset).replace(tzinfo=APP_TZ)
+
         # dateutil will respect the provided default for missing Y/M/D.
         # dayfirst=True is harmless for time-only; fuzzy helps with stray spaces.
         dt = dtparser.parse(
@@ -217,7 +696,7 @@ def parse_horaire(val) -> datetime:
         )
 
         # If the parsed date looks like an Excel epoch artifact (e.g., year < 1970)
-        # and the input had no explicit date, pin to today but keep time.
+        # and the input had no explicit date, pin to the exercise day but keep time.
         if dt.year < 1970 and not re.search(r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4}", txt):
             dt = default_dt.replace(hour=dt.hour, minute=dt.minute, second=dt.second, microsecond=dt.microsecond)
 
@@ -229,6 +708,95 @@ def parse_horaire(val) -> datetime:
 
     return dt
 
+def _clock_offsets(clock: pd.Series) -> pd.Series:
+    """'H:MM[:SS]' strings -> timedeltas (NaT where invalid)."""
+    clock = clock.where(clock.str.count(":") == 2, clock + ":00")
+    return pd.to_timedelta(clock, errors="coerce")
+
+def parse_horaire_column(values: pd.Series, anchor: Optional[datetime] = None) -> List[Any]:
+    """
+    Column-wise parse_horaire, straight to epoch milliseconds. Returns a list
+    aligned on `values` holding the int ms of each cell, or the exception
+    parse_horaire raised for it.
+
+    Time-of-day cells and "HH:MM[:SS]", "J+n HH:MM" and "T+HH:MM" strings,
+    datetimes and Excel serials are converted with batched pandas operations;
+    only the stragglers (AM/PM, dates written as text, stray words, empty
+    cells, times skipped or repeated by a DST change...) go through
+    parse_horaire one by one.
+    """
+    anchor = anchor or exercise_anchor()
+    values = values.reset_index(drop=True)
+    day = pd.Timestamp(anchor.date())
+    one_day = pd.Timedelta(days=1)
+    wall = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")  # naive, APP_TZ wall time
+    kinds = values.map(type)
+
+    # 1) Time-of-day cells, clock strings and J+n -> exercise day (+ n days) + offset
+    is_str = kinds.eq(str)
+    text = values[is_str].str.strip()
+    clock = text[text.str.fullmatch(_CLOCK_RE)]
+    clock = pd.concat([clock, values[kinds.eq(dtime)].astype(str)])
+    offsets = _clock_offsets(clock)
+    offsets = offsets[(offsets >= pd.Timedelta(0)) & (offsets < one_day)]
+    wall[offsets.index] = day + offsets
+    days = text.str.extract(f"^{_DAY_RE}$").dropna(subset=[0])
+    if not days.empty:
+        offsets = _clock_offsets(days[1].fillna("0:00"))
+        offsets = offsets[(offsets >= pd.Timedelta(0)) & (offsets < one_day)]
+        wall[offsets.index] = day + pd.to_timedelta(days[0][offsets.index].astype(int), unit="D") + offsets
+
+    # 2) Naive datetimes (aware ones are left to parse_horaire)
+    is_dt = kinds.isin([datetime, pd.Timestamp]) & values.map(lambda v: getattr(v, "tzinfo", 1) is None)
+    if is_dt.any():
+        try:
+            wall[is_dt] = pd.to_datetime(values[is_dt])
+        except (ValueError, TypeError):
+            pass
+
+    # 3) Excel serials: whole days since 1899-12-30, or a fraction of the exercise day
+    is_num = kinds.isin([int, float]) & values.notna()
+    if is_num.any():
+        serials = values[is_num].astype(float)
+        fraction = serials[(serials >= 0) & (serials < 1)]
+        wall[fraction.index] = day + pd.to_timedelta((fraction * 86400).round(), unit="s")
+        whole = serials[serials >= 1]
+        try:
+            wall[whole.index] = pd.to_datetime(whole, unit="D", origin="1899-12-30")
+        except (ValueError, OverflowError):
+            pass
+
+    # Wall times -> epoch ms; ambiguous/nonexistent local times fall back to parse_horaire
+    local = wall.dt.tz_localize(APP_TZ, ambiguous="NaT", nonexistent="NaT")
+    ms = pd.Series(pd.NA, index=values.index, dtype="Int64")
+    resolved = local.notna()
+    ms[resolved] = (local[resolved] - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
+
+    # 4) T+HH:MM -> exercise start + offset (elapsed time, whatever the DST)
+    relative = text.str.extract(f"^{_RELATIVE_RE}$").dropna(subset=[0])
+    if not relative.empty:
+        offsets = _clock_offsets(relative[1]).dropna() // pd.Timedelta(milliseconds=1)
+        signs = relative[0][offsets.index].map({"+": 1, "-": -1})
+        ms[offsets.index] = _epoch_ms(anchor) + signs * offsets
+
+    out: List[Any] = []
+    for val, at_ms in zip(values.tolist(), ms.tolist()):
+        if at_ms is not pd.NA:
+            out.append(int(at_ms))
+            continue
+        if val is None or (isinstance(val, float) and pd.isna(val)):
+            out.append(ValueError("horaire manquant"))
+            continue
+        try:
+            out.append(_epoch_ms(parse_horaire(val, anchor)))
+        except Exception as e:
+            out.append(e)
+    return out
+
+def _text_column(values: pd.Series, default: str = "") -> List[str]:
+    """Column-wise `str(v).strip() if pd.notna(v) else default`."""
+    return values.astype(str).str.strip().where(values.notna(), default).tolist()
+
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -257,149 +825,1095 @@ def upload_image():
 def inject_tracking():
     return dict(TRACKING=TRACKING)
 
-def extract_roles_from_messages() -> None:
-    """Extract unique, non-empty destinataires from MESSAGES and sort alphabetically."""
-    global ROLES
-    with STATE_LOCK:
-        roles_set = set()
-        for m in MESSAGES:
-            dest = m.get("destinataire", "").strip()
-            if dest:
-                # Split by newline and add each as a separate role
-                for role in dest.split('\n'):
-                    role = role.strip()
-                    if role and role.lower() != "tous":  # Exclude empty and "tous" (broadcast)
-                        roles_set.add(role)
-        ROLES = sorted(list(roles_set))
-    app.logger.info(f"ROLES extracted: {ROLES} ({len(ROLES)} roles found)")
+def build_role_index(messages: List[Inject]) -> tuple:
+    """
+    Map each destinataire role to the sorted positions of the messages it
+    receives, "tous" broadcasts included. Returns (role_index, broadcast_positions).
+    """
+    broadcast: List[int] = []
+    targeted: Dict[str, List[int]] = {}
+    for i, m in enumerate(messages):
+        dest = m.destinataire.strip()
+        if dest.casefold() == "tous":
+            broadcast.append(i)
+            continue
+        # Handle multiple destinataires separated by newline
+        for role in dest.split('\n'):
+            role = role.strip()
+            if role and role.lower() != "tous":  # Exclude empty and "tous" (broadcast)
+                positions = targeted.setdefault(role, [])
+                if not positions or positions[-1] != i:
+                    positions.append(i)
+    role_index = {role: tuple(sorted(positions + broadcast)) for role, positions in targeted.items()}
+    return MappingProxyType(role_index), tuple(broadcast)
+
 
 @app.context_processor
 def inject_tracking():
     return dict(TRACKING=TRACKING)
 
-def load_pms(file_like) -> None:
-    """Load tweets from PMS file."""
-    df = pd.read_excel(file_like, engine="openpyxl")
-    if df.empty:
-        raise ValueError("Fichier PMS vide")
+def _tweet_payload(t: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": t["id"],
+        "emetteur": t["emetteur"],
+        "texte": t["texte"],
+        "at": _ms_datetime(t["at_ms"]).isoformat(),
+        "at_ms": t["at_ms"],
+    }
 
-    cols = {unidecode(c).strip().lower(): c for c in df.columns}
-    required = ["horaire", "emetteur", "stimuli"]
-    missing = [k for k in required if k not in cols]
-    if missing:
-        raise ValueError(f"Colonnes manquantes dans DPS: {', '.join(missing)}")
+def _message_payload(m: Inject) -> Dict[str, Any]:
+    return {
+        "id": m.id,
+        "emetteur": m.emetteur,
+        "destinataire": m.destinataire,
+        "stimuli": m.stimuli,
+        "at": m.at.isoformat(),
+        "at_ms": m.at_ms,
+    }
+
+def _message_label(m: Inject) -> str:
+    return f"Message à {m.destinataire} (de {m.emetteur})"
+
+def _message_view(m: Inject) -> Dict[str, Any]:
+    return {
+        "id": m.id,
+        "label": _message_label(m),
+        "at": m.at.isoformat(),
+        "at_ms": m.at_ms,
+        "emetteur": m.emetteur,
+        "destinataire": m.destinataire,
+        "stimuli": m.stimuli,
+    }
+
+def _animateur_payload(m: Inject, view: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        **(view or _message_view(m)),
+        "reaction": m.reaction,
+        "commentaire": m.commentaire,
+    }
+
+def _json_fragment(payload: Dict[str, Any]) -> bytes:
+    """Serialize one stream item once; streams splice these into their frames."""
+    return app.json.dumps(payload).encode("utf-8")
 
-    tweets: List[Dict[str, Any]] = []
+def _sse_frame(event: str, fragments: List[bytes], event_id: str) -> bytes:
+    """Assemble an SSE frame whose data is the JSON array of the given fragments."""
+    return (b"event: " + event.encode("ascii") + b"\nid: " + event_id.encode("ascii")
+            + b"\ndata: [" + b",".join(fragments) + b"]\n\n")
 
-    for idx, row in df.iterrows():
+# --- Parsed-scenario cache: normalized loader output keyed by workbook content ---
+PARSER_VERSION = 5  # bump whenever parse_pms/parse_excel output changes shape or meaning
+
+def _parse_context(anchor: str) -> str:
+    """What a parsed scenario depends on besides the file itself (`anchor`: ISO exercise anchor)."""
+    return f"{PARSER_VERSION}|{TZ}|{anchor}"
+
+def _restorable(context: str) -> bool:
+    """
+    Whether a scenario parsed in `context` can be reused as is: same parser
+    and time zone, and the configured EXERCISE_START if any. Without one the
+    anchor is the day of that load, which a restart after midnight keeps.
+    """
+    parser_version, tz, anchor = context.split("|", 2)
+    if (parser_version, tz) != (str(PARSER_VERSION), TZ):
+        return False
+    return EXERCISE_ANCHOR is None or anchor == EXERCISE_ANCHOR.isoformat()
+
+def _cache_path(kind: str, data: bytes, anchor: str) -> str:
+    """
+    Cache entry for `data`. Horaires resolve against the exercise anchor in
+    APP_TZ, so both are part of the key along with the parser version.
+    """
+    h = hashlib.sha256()
+    h.update(f"{kind}|{_parse_context(anchor)}|".encode("utf-8"))
+    h.update(data)
+    return os.path.join(SCENARIO_CACHE_DIR, f"{kind}-{h.hexdigest()}.pkl")
+
+def _prune_cache(kind: str, keep: int = 8) -> None:
+    """Keep only the `keep` most recent entries of `kind`."""
+    entries = sorted(Path(SCENARIO_CACHE_DIR).glob(f"{kind}-*.pkl"),
+                     key=lambda p: p.stat().st_mtime, reverse=True)
+    for p in entries[keep:]:
         try:
-            when = parse_horaire(row[cols["horaire"]])
-            emet = row[cols["emetteur"]]
-            stim = row[cols["stimuli"]]
-
-            tid = f"tw-{int(when.timestamp())}-{idx}"
-            tweets.append({
-                "id": tid,
-                "at": when,
-                "emetteur": str(emet).strip() if pd.notna(emet) else "Anonyme",
-                "texte": str(stim).strip() if pd.notna(stim) else "",
-            })
+            p.unlink()
+        except OSError:
+            pass
+
+def cached_parse(kind: str, file_like, parse, anchor: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Return parse(BytesIO, anchor) for the workbook in `file_like`, resolved
+    against `anchor` (the current exercise_anchor() by default), served from
+    SCENARIO_CACHE_DIR when the same bytes were already parsed against it.
+    A missing or unreadable cache only costs a reparse.
+    """
+    data = file_like.read()
+    anchor = anchor or exercise_anchor()
+    if not SCENARIO_CACHE_DIR:
+        return parse(io.BytesIO(data), anchor)
+
+    path = _cache_path(kind, data, anchor.isoformat())
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        app.logger.warning(f"Cache {path} illisible, nouvelle analyse: {e}")
+
+    parsed = parse(io.BytesIO(data), anchor)
+    try:
+        os.makedirs(SCENARIO_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(parsed, f, protocol=5)
+        os.replace(tmp, path)
+        _prune_cache(kind)
+    except OSError as e:
+        app.logger.warning(f"Impossible d'écrire le cache {path}: {e}")
+    return parsed
+
+# --- Streaming sheet reader: rows are converted chunk by chunk as they are read ---
+INGEST_CHUNK_ROWS = 500
+
+def _header_names(header) -> List[str]:
+    """Column names as pandas would label them (blank -> 'Unnamed: i', duplicates -> 'x.1')."""
+    names: List[str] = []
+    for i, h in enumerate(header):
+        name = f"Unnamed: {i}" if h is None or str(h).strip() == "" else str(h)
+        base, n = name, 0
+        while name in names:
+            n += 1
+            name = f"{base}.{n}"
+        names.append(name)
+    return names
+
+def _xlsx_chunks(file_like, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    wb = load_workbook(file_like, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        columns = _header_names(next(rows, ()))
+        start, batch = 0, []
+        for row in rows:
+            if all(v is None or (isinstance(v, str) and not v.strip()) for v in row):
+                continue  # blank lines are skipped, as pandas does
+            batch.append(tuple(row[:len(columns)]) + (None,) * (len(columns) - len(row)))
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=columns, dtype=object,
+                                   index=range(start, start + len(batch)))
+                start, batch = start + len(batch), []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, dtype=object,
+                               index=range(start, start + len(batch)))
+    finally:
+        wb.close()
+
+def _csv_chunks(file_like, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(file_like, sep=None, engine="python", dtype=str,
+                     encoding="utf-8-sig", chunksize=chunk_rows) as reader:
+        for df in reader:
+            df.columns = [str(c) for c in df.columns]
+            yield df
+
+def iter_sheet(file_like, chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read a scenario sheet chunk by chunk: an .xlsx workbook (first sheet,
+    read-only row iterator) or a CSV file (separator sniffed, UTF-8). Chunks
+    hold at most `chunk_rows` rows indexed by data row position, so callers
+    validate and convert each one as it is read and stop at the first bad row
+    without loading the rest of the file.
+    """
+    magic = file_like.read(4)
+    file_like.seek(0)
+    if magic == b"PK\x03\x04":  # zip container
+        return _xlsx_chunks(file_like, chunk_rows)
+    return _csv_chunks(file_like, chunk_rows)
+
+def _sheet_columns(chunks: Iterator[pd.DataFrame], empty_msg: str) -> Tuple[List[str], Iterator[pd.DataFrame]]:
+    """Peek the first chunk for the column names; raise `empty_msg` when there is no data row."""
+    first = next(chunks, None)
+    if first is None or first.empty:
+        raise ValueError(empty_msg)
+    return list(first.columns), itertools.chain([first], chunks)
+
+def parse_pms(file_like, anchor: Optional[datetime] = None) -> Dict[str, Any]:
+    """Parse a PMS workbook into its normalized tweets, resolved against `anchor`."""
+    anchor = anchor or exercise_anchor()
+    # closed here, so a rejected row does not leave the reader open for the GC
+    with closing(iter_sheet(file_like)) as sheet:
+        columns, chunks = _sheet_columns(sheet, "Fichier PMS vide")
+
+        cols = {unidecode(c).strip().lower(): c for c in columns}
+        required = ["horaire", "emetteur", "stimuli"]
+        missing = [k for k in required if k not in cols]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans DPS: {', '.join(missing)}")
+
+        tweets: List[Dict[str, Any]] = []
+
+        for df in chunks:
+            rows = zip(
+                df.index,
+                parse_horaire_column(df[cols["horaire"]], anchor),
+                _text_column(df[cols["emetteur"]], "Anonyme"),
+                _text_column(df[cols["stimuli"]]),
+            )
+            for idx, when, emet, stim in rows:
+                if isinstance(when, Exception):
+                    raise ValueError(f"PMS Ligne {idx+2}: {when}")
+
+                tid = f"tw-{when // 1000}-{idx}"
+                tweets.append({
+                    "id": tid,
+                    "at_ms": when,
+                    "emetteur": emet,
+                    "texte": stim,
+                })
+
+        tweets.sort(key=lambda r: r["at_ms"])
+        return {"tweets": tweets, "anchor": anchor.isoformat()}
+
+def apply_pms(parsed: Dict[str, Any], version: Optional[int] = None) -> Scenario:
+    """Publish the tweets of a parsed PMS file."""
+    tweets = parsed["tweets"]
+    sc = publish_scenario(
+        "tweet",
+        version=version,
+        tweets=tuple(tweets),
+        tweet_ats=array("q", (t["at_ms"] for t in tweets)),
+        tweet_json=tuple(_json_fragment(_tweet_payload(t)) for t in tweets),
+    )
+    SCHEDULER.reload()
+    return sc
+
+def parse_excel(file_like, anchor: Optional[datetime] = None) -> Dict[str, Any]:
+    """Parse a Chronogramme workbook into its normalized messages and décomptes, resolved against `anchor`."""
+    anchor = anchor or exercise_anchor()
+    with closing(iter_sheet(file_like)) as sheet:
+        columns, chunks = _sheet_columns(sheet, "Fichier Excel vide")
+
+        cols = {unidecode(c).strip().lower(): c for c in columns}
+        required = ["horaire", "type", "emetteur", "stimuli"]
+        missing = [k for k in required if k not in cols]
+        if missing:
+            raise ValueError(f"Colonnes manquantes: {', '.join(missing)}")
+
+        messages: List[Inject] = []
+        decompte_events: List[Dict[str, Any]] = []
+
+        for df in chunks:
+            # Accept 'message', 'decompte' (skip 'tweet'); only those rows are parsed
+            types = df[cols["type"]].map(norm).str.lower()
+            df = df[types.isin(["message", "decompte"])]
+            types = types[df.index]
+
+            def text(key: str) -> List[str]:
+                return _text_column(df[cols[key]]) if key in cols else [""] * len(df)
+
+            rows = zip(
+                df.index,
+                types.tolist(),
+                parse_horaire_column(df[cols["horaire"]], anchor),
+                df[cols["id"]].tolist() if "id" in cols else [None] * len(df),
+                text("emetteur"), text("destinataire"), text("stimuli"),
+                text("reaction attendue"), text("commentaire"), text("livrable"),
+            )
+            for idx, typ, when, rid, emet, dest, stim, reaction, commentaire, livrable in rows:
+                try:
+                    if isinstance(when, Exception):
+                        raise when
+                    rid = str(int(rid)).strip() if pd.notna(rid) else ""
+
+                    if typ == "message":
+                        if not dest:
+                            raise ValueError("Destinataire manquant pour message")
+                        messages.append(Inject(
+                            id=rid or f"msg-{when // 1000}-{idx}",
+                            at_ms=when,
+                            emetteur=emet,
+                            destinataire=dest,
+                            stimuli=stim,
+                            reaction=reaction,
+                            commentaire=commentaire,
+                            livrable=livrable,
+                        ))
+                        continue
+
+                    if typ == "decompte":
+                        # stimuli must contain an integer (minutes)
+                        m = re.search(r"(\d+)", stim)
+                        if not m:
+                            raise ValueError("décompte: 'stimuli' doit contenir le nombre de minutes (ex: 15)")
+                        minutes = int(m.group(1))
+                        if minutes <= 0:
+                            raise ValueError("décompte: minutes doit être > 0")
+                        decompte_events.append({
+                            "start_ms": when,
+                            "end_ms": when + minutes * 60_000,
+                            "minutes": minutes
+                        })
+                        continue
+
+                except Exception as e:
+                    raise ValueError(f"Ligne {idx+2}: {e}")
+
+        messages.sort(key=lambda m: m.at_ms)
+        decompte_events.sort(key=lambda r: r["start_ms"])
+        return {"messages": messages, "decompte_events": decompte_events, "anchor": anchor.isoformat()}
+
+def diff_messages(old: Scenario, messages: List[Inject]) -> tuple:
+    """
+    Serialize `messages` for the streams, reusing the fragments of the ones
+    unchanged since `old` (equal records, animator notes included). Returns
+    (message_json, animateur_json, changed ids, removed ids); an id repeated
+    in either version always counts as changed.
+    """
+    previous: Dict[str, Optional[int]] = {}
+    for i, m in enumerate(old.messages):
+        previous[m.id] = None if m.id in previous else i
+    counts: Dict[str, int] = {}
+    for m in messages:
+        counts[m.id] = counts.get(m.id, 0) + 1
+
+    message_json, animateur_json, changed = [], [], set()
+    for m in messages:
+        i = previous.get(m.id)
+        if i is not None and counts[m.id] == 1 and old.messages[i] == m:
+            message_json.append(old.message_json[i])
+            animateur_json.append(old.animateur_json[i])
+        else:
+            message_json.append(_json_fragment(_message_payload(m)))
+            animateur_json.append(_json_fragment(_animateur_payload(m)))
+            changed.add(m.id)
+    removed = frozenset(previous.keys() - counts.keys())
+    return tuple(message_json), tuple(animateur_json), frozenset(changed), removed
+
+def apply_excel(parsed: Dict[str, Any], version: Optional[int] = None) -> Scenario:
+    """
+    Publish a parsed Chronogramme. Messages are diffed by id against the
+    current snapshot: unchanged ones keep their serialized fragments and live
+    streams only receive what was added, edited or removed.
+    """
+    messages, decompte_events = parsed["messages"], parsed["decompte_events"]
+
+    role_index, broadcast_index = build_role_index(messages)
+    roles = tuple(sorted(role_index))
+
+    decompte_bounds, decompte_ends = compile_decompte_windows(decompte_events)
+
+    old = SCENARIO
+    message_json, animateur_json, changed, removed = diff_messages(old, messages)
+    id_index: Dict[str, List[int]] = {}
+    for i, m in enumerate(messages):
+        id_index.setdefault(m.id, []).append(i)
+
+    sc = publish_scenario(
+        "message",
+        changes=(old.message_version, changed, removed),
+        version=version,
+        messages=tuple(messages),
+        message_ats=array("q", (m.at_ms for m in messages)),
+        message_json=message_json,
+        animateur_json=animateur_json,
+        message_id_index=MappingProxyType({k: tuple(v) for k, v in id_index.items()}),
+        role_index=role_index,
+        broadcast_index=broadcast_index,
+        roles=roles,
+        decompte_events=tuple(decompte_events),
+        decompte_bounds=decompte_bounds,
+        decompte_ends=decompte_ends,
+        anchor=parsed["anchor"],
+    )
+    app.logger.info(f"ROLES extracted: {list(roles)} ({len(roles)} roles found)")
+    if old.messages:
+        updated = changed & {m.id for m in old.messages}
+        app.logger.info(f"Chronogramme rechargé: {len(changed - updated)} ajout(s), "
+                        f"{len(updated)} modification(s), {len(removed)} suppression(s)")
+    SCHEDULER.reload()
+    return sc
+
+
+# --- SSE connection limits: bounded notification buffers and connection caps ---
+OVERFLOW_ITEM = ("overflow", None)  # tells a driver to end a stream that fell behind
+
+def coalesce_notification(pending, item) -> bool:
+    """
+    Merge `item` into the notification of the same kind in `pending` (a deque
+    or list of (kind, watermark)), in place and keeping the highest
+    watermark. False when none of that kind is pending.
+    """
+    kind, watermark = item
+    for i, (pending_kind, pending_watermark) in enumerate(pending):
+        if pending_kind == kind:
+            if watermark is not None and pending_watermark is not None:
+                watermark = max(watermark, pending_watermark)
+            pending[i] = (kind, watermark)
+            return True
+    return False
+
+class StreamQueue(queue.Queue):
+    """
+    Bounded subscriber queue. put() is called by the scheduler with its lock
+    held and never blocks. With STREAM_OVERFLOW=drop, a notification of a kind
+    already pending is merged into it (they only carry a watermark, the
+    latest supersedes), so a slow client holds at most one per kind and no
+    kind is ever evicted. With STREAM_OVERFLOW=disconnect, a queue reaching
+    STREAM_QUEUE_MAX pending notifications is flushed down to OVERFLOW_ITEM.
+    """
+
+    def __init__(self, maxsize: int = STREAM_QUEUE_MAX, policy: str = STREAM_OVERFLOW):
+        super().__init__(maxsize)
+        self.policy = policy
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None) -> None:
+        with self.mutex:
+            if self.policy != "disconnect":
+                if coalesce_notification(self.queue, item):
+                    STREAM_OVERFLOWS.inc(self.policy)
+                    return
+            elif len(self.queue) >= self.maxsize > 0:
+                STREAM_OVERFLOWS.inc(self.policy)
+                if self.queue[0] is OVERFLOW_ITEM:
+                    return
+                self.queue.clear()
+                item = OVERFLOW_ITEM
+            self.queue.append(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class StreamSlots:
+    """Counts open streams per client IP and in total against the configured caps."""
+
+    def __init__(self, per_ip: int = STREAM_MAX_PER_IP, total: int = STREAM_MAX_TOTAL):
+        self.per_ip, self.total = per_ip, total
+        self._lock = threading.Lock()
+        self._open: Dict[str, int] = {}
+        self._count = 0
+
+    def acquire(self, ip: str) -> Optional[str]:
+        """Take a slot for `ip`; returns the reason ("total" / "ip") if a cap refuses it."""
+        with self._lock:
+            if self.total and self._count >= self.total:
+                reason = "total"
+            elif self.per_ip and self._open.get(ip, 0) >= self.per_ip:
+                reason = "ip"
+            else:
+                self._count += 1
+                self._open[ip] = self._open.get(ip, 0) + 1
+                return None
+        STREAMS_REJECTED.inc(reason)
+        return reason
+
+    def release(self, ip: str) -> None:
+        with self._lock:
+            self._count -= 1
+            n = self._open.get(ip, 0) - 1
+            if n > 0:
+                self._open[ip] = n
+            else:
+                self._open.pop(ip, None)
+
 
+STREAM_SLOTS = StreamSlots()
+HEARTBEAT_FRAME = b": keepalive\n\n"
+# Sent instead of a stream when a cap is reached: EventSource retries after 30s
+REFUSED_FRAME = b"retry: 30000\n: trop de connexions, nouvel essai dans 30s\n\n"
+
+# --- Scenario clock: real time, fixed offset, accelerated playback, pause ---
+@dataclasses.dataclass(frozen=True, slots=True)
+class ClockState:
+    """Scenario time = virtual_at + (real time - real_at) * speed; frozen at virtual_at while paused."""
+    real_at: float
+    virtual_at: float
+    speed: float = 1.0
+    paused: bool = False
+
+    def now(self, real: Optional[float] = None) -> float:
+        if self.paused:
+            return self.virtual_at
+        return self.virtual_at + ((time.time() if real is None else real) - self.real_at) * self.speed
+
+    def to_json(self) -> bytes:
+        return json.dumps(dataclasses.asdict(self)).encode("utf-8")
+
+    @classmethod
+    def from_json(cls, payload) -> "ClockState":
+        return cls(**json.loads(payload))
+
+
+class ScenarioClock:
+    """
+    The time every due-ness decision is made against: the scheduler, the
+    streams, the pages and the countdowns read CLOCK.now() instead of the wall
+    clock. Real time by default; /admin can jump to another scenario time
+    (fixed offset), play it faster (60 = one scenario hour per minute), pause
+    and resume. The state is an immutable ClockState swapped on change, so
+    readers never lock. Scenario versions, journal timestamps and /health
+    stay on real time.
+    """
+
+    def __init__(self, speed: float = 1.0, start: Optional[float] = None):
+        real = time.time()
+        self.state = ClockState(real, real if start is None else start, speed)
+
+    def now(self) -> float:
+        return self.state.now()
+
+    def now_ms(self) -> int:
+        """Scenario time in epoch ms, to compare against the Scenario timelines."""
+        return int(self.state.now() * 1000)
+
+    def real_delay(self, ts_ms: int) -> Optional[float]:
+        """Real seconds until scenario time `ts_ms`; None while paused (it never comes)."""
+        state = self.state
+        if state.paused:
+            return None
+        return (ts_ms / 1000 - state.now()) / state.speed
+
+    def lag(self, ts_ms: int) -> float:
+        """Real seconds since scenario time `ts_ms` was reached."""
+        state = self.state
+        return (state.now() - ts_ms / 1000) / state.speed
+
+    def changed(self, virtual_at: Optional[float] = None, speed: Optional[float] = None,
+                paused: Optional[bool] = None) -> ClockState:
+        """A new state carrying on from the current scenario time, unless `virtual_at` is given."""
+        state, real = self.state, time.time()
+        return ClockState(real, state.now(real) if virtual_at is None else virtual_at,
+                          state.speed if speed is None else speed,
+                          state.paused if paused is None else paused)
+
+    def payload(self) -> Dict[str, Any]:
+        """What the pages need to run the same clock: scenario time now, speed, pause."""
+        state = self.state
+        return {"now_ms": int(state.now() * 1000), "speed": state.speed, "paused": state.paused}
+
+
+def make_clock() -> ScenarioClock:
+    start = None
+    if CLOCK_START:
+        try:
+            start = parse_horaire(CLOCK_START).timestamp()
         except Exception as e:
-            raise ValueError(f"PMS Ligne {idx+2}: {e}")
+            app.logger.warning(f"CLOCK_START invalide '{CLOCK_START}': {e}; heure réelle utilisée")
+    if CLOCK_SPEED <= 0:
+        app.logger.warning(f"CLOCK_SPEED invalide '{CLOCK_SPEED}', vitesse 1 utilisée")
+    return ScenarioClock(CLOCK_SPEED if CLOCK_SPEED > 0 else 1.0, start)
 
-    tweets.sort(key=lambda r: r["at"])
 
-    with STATE_LOCK:
-        TWEETS.clear(); TWEETS.extend(tweets)
-        SENT_TWEET_IDS.clear()
-
-def load_excel(file_like) -> None:
-    """Load Chronogramme (messages, decompte, raw events)."""
-    df = pd.read_excel(file_like, engine="openpyxl")
-    if df.empty:
-        raise ValueError("Fichier Excel vide")
-
-    cols = {unidecode(c).strip().lower(): c for c in df.columns}
-    required = ["horaire", "type", "emetteur", "stimuli"]
-    missing = [k for k in required if k not in cols]
-    if missing:
-        raise ValueError(f"Colonnes manquantes: {', '.join(missing)}")
-
-    messages: List[Dict[str, Any]] = []
-    raw_rows: List[Dict[str, Any]] = []
-    decompte_events: List[Dict[str, Any]] = []
-
-    for idx, row in df.iterrows():
+CLOCK = make_clock()
+app.jinja_env.globals.update(scenario_clock=CLOCK.payload)
+
+# --- Central scheduler: one thread sleeps until the next due 'at' and fans out ---
+class Scheduler:
+    """
+    Single background thread replacing the per-connection polling loops.
+
+    Every future tweet, message and décompte boundary is pushed on a heap keyed
+    on its due timestamp. The thread sleeps until the head of the heap is due,
+    then pushes one notification per kind to the subscriber queues:
+      - ("tweet", watermark) / ("message", watermark) when items became due
+      - ("decompte", None) when a countdown starts or ends
+      - ("reload", watermark) after a scenario (re)load
+    Streams keep an integer cursor into the sorted timeline and bisect the
+    watermark to find what is new. Idle streams block on their queue and cost
+    nothing.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []  # (at_ms, seq, kind)
+        self._seq = itertools.count()
+        self._subscribers: Dict[Any, frozenset] = {}
+        self._watermark = CLOCK.now_ms()  # everything due <= watermark has been fanned out
+        self._thread: Optional[threading.Thread] = None
+
+    def reload(self) -> None:
+        """
+        Rebuild the heap from the current scenario; past items count as already
+        due. The snapshot and the clock are read under the lock, so of two
+        concurrent reloads (upload, pub/sub, file watch, clock change) the
+        last one to get the lock sees the newest state and its heap wins.
+        """
+        with self._cond:
+            now = CLOCK.now_ms()
+            heap = []
+            sc = SCENARIO
+            for ts in sc.tweet_ats[bisect.bisect_right(sc.tweet_ats, now):]:
+                heap.append((ts, next(self._seq), "tweet"))
+            for ts in sc.message_ats[bisect.bisect_right(sc.message_ats, now):]:
+                heap.append((ts, next(self._seq), "message"))
+            for ts in sc.decompte_bounds[bisect.bisect_right(sc.decompte_bounds, now):]:
+                heap.append((ts, next(self._seq), "decompte"))
+            heapq.heapify(heap)
+            self._heap = heap
+            self._watermark = now
+            self._fanout("reload", now)
+            self._fanout("decompte", None)
+            self._cond.notify()
+
+    @property
+    def watermark(self) -> int:
+        return self._watermark
+
+    def subscribe(self, kinds, q=None) -> tuple:
+        """
+        Register a queue for the given kinds. Returns (queue, watermark): items
+        due at or before the watermark are not going to be pushed and must be
+        read from the scenario by the caller; later ones arrive on the queue.
+        `q` may be any object with a thread-safe put() (see asgi.py).
+        """
+        self._ensure_started()
+        if q is None:
+            q = StreamQueue()
+        with self._cond:
+            self._subscribers[q] = frozenset(kinds) | {"reload"}
+            return q, self._watermark
+
+    def unsubscribe(self, q) -> None:
+        with self._cond:
+            self._subscribers.pop(q, None)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="murail-scheduler", daemon=True)
+                self._thread.start()
+
+    def _fanout(self, kind: str, payload) -> None:
+        # Caller holds self._cond
+        for q, kinds in self._subscribers.items():
+            if kind in kinds:
+                q.put((kind, payload))
+
+    def _run(self) -> None:
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                # Scenario time: a clock change calls reload(), which wakes us up
+                now = CLOCK.now_ms()
+                delay = CLOCK.real_delay(self._heap[0][0])
+                if delay is None:
+                    self._cond.wait()
+                    continue
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+                due = set()
+                while self._heap and self._heap[0][0] <= now:
+                    due.add(heapq.heappop(self._heap)[2])
+                self._watermark = now
+                for kind in ("tweet", "message"):
+                    if kind in due:
+                        self._fanout(kind, now)
+                if "decompte" in due:
+                    self._fanout("decompte", None)
+
+
+SCHEDULER = Scheduler()
+
+# --- Delivery journal: append-only SQLite log, restart without re-parsing ---
+class Journal:
+    """
+    Append-only record of the exercise in a SQLite database in WAL mode:
+      - loads: every scenario payload applied, with its parsed form and the
+        version it was published under
+      - events: messages/tweets becoming due and countdowns starting/ending,
+        as the scheduler fans them out (including those a clock jump carries
+        past), and scenario clock changes. Items already due when a new
+        scenario version is loaded are not journaled one by one
+    Writes are queued to one writer thread that commits in batches every
+    JOURNAL_FLUSH_INTERVAL (synchronous=NORMAL: the WAL is only fsynced at
+    checkpoints), so neither the scheduler nor a request waits on the disk.
+
+    On restart the last load of each channel is restored from its parsed form
+    under its original version: no workbook is read again, and the clients'
+    Last-Event-IDs stay valid so their streams resume where they stopped.
+    Each load records the digest of the channel's file on disk at that time
+    (`source`); if the file was edited since, it is loaded instead. A clock
+    changed from /admin the same day is restored too.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS loads (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            channel TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            context TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            parsed BLOB NOT NULL,
+            source TEXT
+        );
+        CREATE INDEX IF NOT EXISTS loads_channel ON loads (channel, seq);
+        CREATE TABLE IF NOT EXISTS events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            kind TEXT NOT NULL,
+            version INTEGER,
+            position INTEGER,
+            detail TEXT
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue()
+        self._delivered: Dict[str, tuple] = {}  # timeline -> (version, due count) journaled
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+            # journals written before the source column
+            if "source" not in {row[1] for row in conn.execute("PRAGMA table_info(loads)")}:
+                conn.execute("ALTER TABLE loads ADD COLUMN source TEXT")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self) -> None:
+        """Start the writer and journal what the scheduler fans out from now on."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="murail-journal", daemon=True)
+            self._thread.start()
+            _, watermark = SCHEDULER.subscribe(("tweet", "message", "decompte"), q=self)
+            self.put(("reload", watermark))
+            atexit.register(self.close)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush what is queued and stop the writer."""
+        if self._thread is not None:
+            SCHEDULER.unsubscribe(self)
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def record_load(self, channel: str, version: int, digest: str, payload: bytes, parsed,
+                    source: Optional[str] = None) -> None:
+        self._queue.put(("load", time.time(), channel, version, digest, payload, parsed, source))
+
+    def record_clock(self, state: ClockState) -> None:
+        self._queue.put(("clock", time.time(), state))
+
+    # Called from the scheduler thread: only enqueue, the writer does the rest
+    def put(self, item) -> None:
+        self._queue.put(("event", time.time(), CLOCK.now_ms(), item, SCENARIO))
+
+    def last_load(self, channel: str) -> Optional[tuple]:
+        """(version, digest, source, parsed) of the channel's last load, if it can be restored (see _restorable)."""
+        conn = self._connect()
         try:
-            typ = norm(row[cols["type"]]).lower()
-            # Accept 'message', 'decompte' (skip 'tweet')
-            if typ not in {"message", "decompte"}:
+            row = conn.execute(
+                "SELECT version, digest, context, source, parsed FROM loads WHERE channel = ? ORDER BY seq DESC LIMIT 1",
+                (channel,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or not _restorable(row[2]):
+            return None
+        return row[0], row[1], row[3], pickle.loads(row[4])
+
+    def last_clock(self) -> Optional[ClockState]:
+        """
+        The last scenario clock set from /admin, if it was set since the exercise
+        start: the anchor of the last restorable load, else exercise_anchor().
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT ts, detail FROM events WHERE kind = 'clock' ORDER BY seq DESC LIMIT 1"
+            ).fetchone()
+            load = conn.execute("SELECT context FROM loads ORDER BY seq DESC LIMIT 1").fetchone()
+        finally:
+            conn.close()
+        anchor = exercise_anchor()
+        if load is not None and _restorable(load[0]):
+            anchor = dtparser.isoparse(load[0].split("|", 2)[2])
+        if row is None or row[0] < anchor.timestamp():
+            return None
+        return ClockState.from_json(row[1])
+
+    def _rows(self, item) -> Iterator[tuple]:
+        """Turn a queued item into ("loads"|"events", values) rows."""
+        if item[0] == "load":
+            _, ts, channel, version, digest, payload, parsed, source = item
+            yield "loads", (ts, channel, version, digest, _parse_context(parsed["anchor"]), payload,
+                            pickle.dumps(parsed, protocol=5), source)
+            return
+        if item[0] == "clock":
+            _, ts, state = item
+            yield "events", (ts, "clock", None, None, state.to_json().decode("utf-8"))
+            return
+        _, ts, scenario_ms, (kind, watermark), sc = item
+        if kind == "decompte":
+            i = bisect.bisect_right(sc.decompte_bounds, scenario_ms) - 1
+            end = sc.decompte_ends[i] if i >= 0 else None
+            yield "events", (ts, "decompte" if end else "decompte_end", sc.message_version, None,
+                             _ms_datetime(end).isoformat() if end else None)
+            return
+        for timeline in (("tweet", "message") if kind == "reload" else (kind,)):
+            version = getattr(sc, f"{timeline}_version")
+            hi = bisect.bisect_right(getattr(sc, f"{timeline}_ats"), watermark)
+            prev_version, lo = self._delivered.get(timeline, (None, hi))
+            if prev_version == version:
+                hi = max(hi, lo)  # rewinding the clock does not undeliver anything
+            self._delivered[timeline] = (version, hi)
+            # a reload under the same version (clock jump) journals what it carried past
+            if prev_version != version or hi <= lo:
                 continue
+            items = sc.messages[lo:hi] if timeline == "message" else sc.tweets[lo:hi]
+            ids = [m.id for m in items] if timeline == "message" else [t["id"] for t in items]
+            yield "events", (ts, timeline, version, hi, json.dumps(ids, ensure_ascii=False))
+
+    def _run(self) -> None:
+        conn = self._connect()
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + JOURNAL_FLUSH_INTERVAL
+            while (timeout := deadline - time.monotonic()) > 0:
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [item for item in batch if item is not None]
+            try:
+                with conn:
+                    for item in batch:
+                        for table, values in self._rows(item):
+                            if table == "loads":
+                                conn.execute("INSERT INTO loads (ts, channel, version, digest, context, payload, parsed, source) "
+                                             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+                            else:
+                                conn.execute("INSERT INTO events (ts, kind, version, position, detail) "
+                                             "VALUES (?, ?, ?, ?, ?)", values)
+            except Exception as e:
+                app.logger.warning(f"Journal {self.path}: écriture impossible: {e}")
+        conn.close()
 
-            when = parse_horaire(row[cols["horaire"]])
-            emet = row[cols["emetteur"]]
-            stim = row[cols["stimuli"]]
-
-            # Keep raw row for animator
-            raw = {
-                "id": (str(int(row[cols["id"]])).strip() if "id" in cols and pd.notna(row[cols["id"]]) else ""),
-                "horaire": row[cols["horaire"]],
-                "type": typ,
-                "Emetteur": (str(emet).strip() if pd.notna(emet) else ""),
-                "Destinataire": (str(row[cols["destinataire"]]).strip() if "destinataire" in cols and pd.notna(row[cols["destinataire"]]) else ""),
-                "stimuli": (str(stim).strip() if pd.notna(stim) else ""),
-                "reaction attendue": (str(row[cols["reaction attendue"]]).strip() if "reaction attendue" in cols and pd.notna(row[cols["reaction attendue"]]) else ""),
-                "commentaire": (str(row[cols["commentaire"]]).strip() if "commentaire" in cols and pd.notna(row[cols["commentaire"]]) else ""),
-                "livrable": (str(row[cols["livrable"]]).strip() if "livrable" in cols and pd.notna(row[cols["livrable"]]) else ""),
-                "_at": when,
-            }
-            raw_rows.append(raw)
-
-            if typ == "message":
-                mid = raw["id"] or f"msg-{int(when.timestamp())}-{idx}"
-                dest = raw["Destinataire"]
-                if not dest:
-                    raise ValueError("Destinataire manquant pour message")
-                messages.append({
-                    "id": mid,
-                    "at": when,
-                    "emetteur": str(emet).strip() if pd.notna(emet) else "",
-                    "destinataire": dest,
-                    "stimuli": str(stim).strip() if pd.notna(stim) else "",
-                })
-                continue
 
-            if typ == "decompte":
-                # stimuli must contain an integer (minutes)
-                stim_txt = str(stim).strip() if pd.notna(stim) else ""
-                m = re.search(r"(\d+)", stim_txt)
-                if not m:
-                    raise ValueError("décompte: 'stimuli' doit contenir le nombre de minutes (ex: 15)")
-                minutes = int(m.group(1))
-                if minutes <= 0:
-                    raise ValueError("décompte: minutes doit être > 0")
-                start = when
-                end = start + timedelta(minutes=minutes)
-                decompte_events.append({
-                    "start": start,
-                    "end": end,
-                    "minutes": minutes
-                })
-                continue
+JOURNAL: Optional[Journal] = None
+if JOURNAL_FILE:
+    try:
+        JOURNAL = Journal(JOURNAL_FILE)
+    except Exception as e:
+        app.logger.warning(f"Journal {JOURNAL_FILE} indisponible: {e}")
+
+
+# --- Pub/sub backend: propagates scenario loads to every worker / replica ---
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+class MemoryPubSub:
+    """Default backend: a single process holds the state, nothing to propagate."""
+
+    def __init__(self):
+        self._latest: Dict[str, bytes] = {}
+
+    def start(self, handler) -> None:
+        pass
+
+    def publish(self, channel: str, payload: bytes) -> None:
+        self._latest[channel] = payload
+
+    def latest(self, channel: str) -> Optional[bytes]:
+        return self._latest.get(channel)
+
+
+class RedisPubSub:
+    """
+    Redis backend (any RESP-compatible broker; PUBSUB_URL may also be
+    unix:///path/to/redis.sock for a broker on the same box).
+
+    publish() stores the payload as the channel's latest value, so workers
+    started later boot from it, and broadcasts it to the running ones. A
+    listener thread hands payloads from other workers to the handler and
+    re-syncs the latest values after a broker reconnection.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("PUBSUB_BACKEND=redis nécessite le paquet 'redis' (pip install redis)") from e
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = f"murail:{APP_ID}:"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, handler) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen, args=(handler,), name="murail-pubsub", daemon=True)
+            self._thread.start()
+
+    def publish(self, channel: str, payload: bytes) -> None:
+        header = json.dumps({"origin": WORKER_ID, "channel": channel}).encode("utf-8")
+        pipe = self._redis.pipeline()
+        pipe.set(self._prefix + "latest:" + channel, payload)
+        pipe.publish(self._prefix + "events", header + b"\n" + payload)
+        pipe.execute()
+
+    def latest(self, channel: str) -> Optional[bytes]:
+        return self._redis.get(self._prefix + "latest:" + channel)
+
+    def _listen(self, handler) -> None:
+        resync = False
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._prefix + "events")
+                if resync:
+                    # Catch up with anything published while we were disconnected
+                    for channel in (*SCENARIO_CHANNELS, "clock"):
+                        payload = self.latest(channel)
+                        if payload is not None:
+                            handler(channel, payload)
+                resync = True
+                for message in pubsub.listen():
+                    header, _, payload = message["data"].partition(b"\n")
+                    meta = json.loads(header)
+                    if meta.get("origin") != WORKER_ID:
+                        handler(meta["channel"], payload)
+            except Exception as e:
+                app.logger.warning(f"Pub/sub {PUBSUB_BACKEND}: {e}; reconnexion dans 2s")
+                time.sleep(2)
 
+
+def make_pubsub():
+    if PUBSUB_BACKEND == "redis":
+        return RedisPubSub(PUBSUB_URL)
+    if PUBSUB_BACKEND != "memory":
+        app.logger.warning(f"PUBSUB_BACKEND inconnu '{PUBSUB_BACKEND}', utilisation de 'memory'")
+    return MemoryPubSub()
+
+
+PUBSUB = make_pubsub()
+# channel -> (timeline, parser, applier) of the scenario files shared between workers
+SCENARIO_CHANNELS = {
+    "chronogramme": ("message", parse_excel, apply_excel),
+    "pms": ("tweet", parse_pms, apply_pms),
+}
+_APPLIED_DIGESTS: Dict[str, str] = {}  # channel -> sha1 of the last payload applied here
+SCENARIO_FILES = {"chronogramme": CHRONOGRAMME, "pms": PMS}
+
+def _file_digest(path: str) -> Optional[str]:
+    """sha1 of a scenario file on disk (None when missing or unreadable)."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def content_version(channel: str, digest: str, parsed: Dict[str, Any]) -> int:
+    """
+    Timeline version of a load: derived from the payload digest and its parse
+    context, so it is the same on every worker that applies the same upload.
+    52 bits, to stay exact in the pages' JavaScript numbers.
+    """
+    key = f"{channel}|{_parse_context(parsed['anchor'])}|{digest}".encode("utf-8")
+    return int(hashlib.sha1(key).hexdigest()[:13], 16) or 1
+
+def apply_payload(channel: str, payload: bytes, anchor: Optional[datetime] = None) -> None:
+    """Parse (through the cache, against `anchor` if given) and apply a scenario payload, then journal it."""
+    timeline, parse, apply = SCENARIO_CHANNELS[channel]
+    t0 = time.perf_counter()
+    parsed = cached_parse(channel, io.BytesIO(payload), parse, anchor)
+    t1 = time.perf_counter()
+    digest = hashlib.sha1(payload).hexdigest()
+    version = content_version(channel, digest, parsed)
+    apply(parsed, version=version)
+    LOAD_SECONDS.observe(t1 - t0, channel, "parse")
+    LOAD_SECONDS.observe(time.perf_counter() - t1, channel, "apply")
+    _APPLIED_DIGESTS[channel] = digest
+    if JOURNAL is not None:
+        JOURNAL.record_load(channel, version, digest, payload, parsed, _file_digest(SCENARIO_FILES[channel]))
+
+def apply_and_publish(channel: str, payload: bytes) -> None:
+    """Apply an admin upload locally (errors surface to the caller), then share it."""
+    apply_payload(channel, payload)
+    PUBSUB.publish(channel, payload)
+
+def apply_clock(state: ClockState) -> None:
+    """Switch the scenario clock and re-plan the scheduler; open streams get the new state."""
+    if state == CLOCK.state:
+        return
+    CLOCK.state = state
+    SCHEDULER.reload()
+    if JOURNAL is not None:
+        JOURNAL.record_clock(state)
+
+def set_clock_and_publish(state: ClockState) -> None:
+    """Apply a clock change from /admin locally, then share it with the other workers."""
+    apply_clock(state)
+    PUBSUB.publish("clock", state.to_json())
+
+def _on_pubsub(channel: str, payload: bytes) -> None:
+    if channel == "clock":
+        try:
+            apply_clock(ClockState.from_json(payload))
         except Exception as e:
-            raise ValueError(f"Ligne {idx+2}: {e}")
+            app.logger.warning(f"Pub/sub: horloge invalide: {e}")
+        return
+    if channel not in SCENARIO_CHANNELS or _APPLIED_DIGESTS.get(channel) == hashlib.sha1(payload).hexdigest():
+        return
+    try:
+        apply_payload(channel, payload)
+        app.logger.info(f"Pub/sub: '{channel}' rechargé depuis un autre worker")
+    except Exception as e:
+        app.logger.warning(f"Pub/sub: impossible d'appliquer '{channel}': {e}")
 
-    messages.sort(key=lambda r: r["at"])
-    raw_rows.sort(key=lambda r: r["_at"])
-    decompte_events.sort(key=lambda r: r["start"])
+# --- Optional file watch: scenario files saved on disk are reloaded in place ---
+def _file_stamp(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
-    with STATE_LOCK:
-        MESSAGES.clear(); MESSAGES.extend(messages)
-        RAW_ROWS.clear(); RAW_ROWS.extend(raw_rows)
-        DECOMPTE_EVENTS.clear(); DECOMPTE_EVENTS.extend(decompte_events)
-        SENT_MESSAGE_IDS.clear()
+def watch_scenario_files(paths: Dict[str, str], interval: float) -> threading.Thread:
+    """
+    Poll each channel's file every `interval` seconds and apply_and_publish it
+    once its (mtime, size) changed and then stayed put for one more interval,
+    so a workbook still being written is not picked up half-way.
+    """
+    def run() -> None:
+        seen = {channel: _file_stamp(path) for channel, path in paths.items()}
+        pending: Dict[str, tuple] = {}
+        while True:
+            time.sleep(interval)
+            for channel, path in paths.items():
+                stamp = _file_stamp(path)
+                if stamp is None or stamp == seen[channel]:
+                    pending.pop(channel, None)
+                    continue
+                if pending.get(channel) != stamp:
+                    pending[channel] = stamp
+                    continue
+                seen[channel] = pending.pop(channel)
+                try:
+                    with open(path, "rb") as f:
+                        payload = f.read()
+                    if _APPLIED_DIGESTS.get(channel) == hashlib.sha1(payload).hexdigest():
+                        continue
+                    apply_and_publish(channel, payload)
+                    app.logger.info(f"{path} modifié sur disque: rechargé")
+                except Exception as e:
+                    app.logger.warning(f"Impossible de recharger {path}: {e}")
+
+    thread = threading.Thread(target=run, name="scenario-watch", daemon=True)
+    thread.start()
+    return thread
 
 @app.route("/animateur", methods=["GET", "POST"])
 def animateur():
@@ -418,66 +1932,19 @@ def animateur():
             prefill_password=(ANIMATOR_PASSWORD if DEMO else "")
         )
 
-    with STATE_LOCK:
-        n_tw = len(TWEETS)
-        n_msg = len(MESSAGES)
-
-        # méta pour afficher réaction attendue / commentaire par ID
-        meta_by_id = {}
-        for r in RAW_ROWS:
-            if r.get("type") == "message":
-                rid = r.get("id", "")
-                if rid:
-                    meta_by_id[rid] = {
-                        "reaction": r.get("reaction attendue", "") or "",
-                        "commentaire": r.get("commentaire", "") or "",
-                    }
-
-        # timeline = messages uniquement (inclure emetteur/destinataire/stimuli)  # CHANGED
-        events = []
-        for m in MESSAGES:
-            events.append({
-                "at": m["at"],  # datetime TZ-aware
-                "type": "message",
-                "label": f"Message à {m['destinataire']} (de {m['emetteur']})",
-                "msg_id": m["id"],
-                "emetteur": m.get("emetteur", ""),
-                "destinataire": m.get("destinataire", ""),
-                "stimuli": m.get("stimuli", ""),
-            })
-        events.sort(key=lambda e: e["at"])
-
-    # séparation passé / futur
-    now = datetime.now(tz=APP_TZ)
-    past = [e for e in events if e["at"] < now]
-    future = [e for e in events if e["at"] >= now]
-    past5 = past[-5:]
-    next1 = future[0] if future else None
-    next2 = future[1] if len(future) > 1 else None
-
-    # packer au format déjà “digeste” pour le front (ISO + at_ms + champs utiles)  # NEW
-    def pack(e):
-        if not e:
-            return None
-        return {
-            "id": e["msg_id"],
-            "label": e["label"],
-            "at": e["at"].isoformat(),
-            "at_ms": int(e["at"].timestamp() * 1000),
-            "emetteur": e.get("emetteur", ""),
-            "destinataire": e.get("destinataire", ""),
-            "stimuli": e.get("stimuli", ""),
-        }
-
-    past5 = [pack(e) for e in past5]
-    next1 = pack(next1)
-    next2 = pack(next2)
+    sc = SCENARIO
+    # passé / futur: bisect sur "now" dans les vues mémorisées du snapshot
+    i = bisect.bisect_left(sc.message_ats, CLOCK.now_ms())
+    views = sc.message_views
+    past5 = list(views[max(0, i - 5):i])
+    next1 = views[i] if i < len(views) else None
+    next2 = views[i + 1] if i + 1 < len(views) else None
 
     return render_template(
         "animateur.html",
-        n_tweets=n_tw, n_messages=n_msg,
+        n_tweets=len(sc.tweets), n_messages=len(sc.messages),
         past5=past5, next1=next1, next2=next2,
-        meta_by_id=meta_by_id,
+        meta_by_id=dict(sc.message_meta),
     )
 
 
@@ -504,23 +1971,13 @@ def index():
     if end_dt:
         return render_template("countdown.html", target_iso=end_dt.astimezone(APP_TZ).isoformat())
 
-    with STATE_LOCK:
-        n_tw = len(TWEETS)
-        n_msg = len(MESSAGES)
-        events = [
-            {"at": m["at"], "type": "message",
-             "label": f"Message à {m['destinataire']} (de {m['emetteur']})"}
-            for m in MESSAGES
-        ]
-        events.sort(key=lambda e: e["at"])
-
-    now = datetime.now(tz=APP_TZ)
-    past = [e for e in events if e["at"] < now]
-    past5 = past[-5:]
+    sc = SCENARIO
+    i = bisect.bisect_left(sc.message_ats, CLOCK.now_ms())
+    past5 = list(sc.message_events[max(0, i - 5):i])
 
     return render_template(
         "index.html",
-        n_tweets=n_tw, n_messages=n_msg,
+        n_tweets=len(sc.tweets), n_messages=len(sc.messages),
         past5=past5,
         enable_pms=ENABLE_PMS
     )
@@ -539,12 +1996,34 @@ def admin():
         return render_template("admin_login.html")
 
     if request.method == "POST":
+        # Scenario clock: pause / resume / back to real time / jump to a time and speed
+        clock_action = request.form.get("clock")
+        if clock_action:
+            try:
+                if clock_action == "reset":
+                    real = time.time()
+                    state = ClockState(real, real)
+                elif clock_action in ("pause", "resume"):
+                    state = CLOCK.changed(paused=(clock_action == "pause"))
+                else:
+                    speed = float(request.form.get("clock_speed") or CLOCK.state.speed)
+                    if not 0 < speed <= 3600:
+                        raise ValueError(f"vitesse {speed} hors de ]0, 3600]")
+                    jump = request.form.get("clock_time", "").strip()
+                    # resolve against the day the loaded chronogramme was anchored on
+                    anchor = dtparser.isoparse(SCENARIO.anchor) if SCENARIO.anchor else None
+                    state = CLOCK.changed(parse_horaire(jump, anchor).timestamp() if jump else None, speed)
+                set_clock_and_publish(state)
+                flash("Horloge du scénario mise à jour.")
+            except Exception as e:
+                flash(f"Erreur horloge: {e}")
+            return redirect(url_for("admin"))
+
         # Handle Chronogramme upload
         f = request.files.get("file")
-        if f and f.filename and f.filename.lower().endswith((".xlsx", ".xls")):
+        if f and f.filename and f.filename.lower().endswith(SCENARIO_EXTENSIONS):
             try:
-                load_excel(f)
-                extract_roles_from_messages()  # Extract roles after loading
+                apply_and_publish("chronogramme", f.read())
                 flash("Chronogramme chargé avec succès.")
             except Exception as e:
                 flash(f"Erreur de chargement Chronogramme: {e}")
@@ -552,38 +2031,28 @@ def admin():
         
         # Handle PMS upload
         pms_f = request.files.get("pms_file")
-        if pms_f and pms_f.filename and pms_f.filename.lower().endswith((".xlsx", ".xls")):
+        if pms_f and pms_f.filename and pms_f.filename.lower().endswith(SCENARIO_EXTENSIONS):
             try:
-                load_pms(pms_f)
+                apply_and_publish("pms", pms_f.read())
                 flash("PMS chargé avec succès.")
             except Exception as e:
                 flash(f"Erreur de chargement PMS: {e}")
             return redirect(url_for("admin"))
         
-        flash("Veuillez sélectionner un fichier Excel (.xlsx/.xls)")
+        flash("Veuillez sélectionner un fichier Excel ou CSV (.xlsx/.xls/.csv)")
         return redirect(url_for("admin"))
 
-    with STATE_LOCK:
-        n_tw = len(TWEETS)
-        n_msg = len(MESSAGES)
-        events = []
-        for t in TWEETS:
-            events.append({"at": t["at"], "type": "tweet", "label": f"Tweet de {t['emetteur']}"})
-        for m in MESSAGES:
-            events.append({"at": m["at"], "type": "message", "label": f"Message à {m['destinataire']} (de {m['emetteur']})"})
-        events.sort(key=lambda e: e["at"])
-
-    now = datetime.now(tz=APP_TZ)
-    past = [e for e in events if e["at"] < now]
-    future = [e for e in events if e["at"] >= now]
-    past5 = past[-5:]
-    next1 = future[0] if future else None
-    next2 = future[1] if len(future) > 1 else None
+    sc = SCENARIO
+    ats, events = sc.admin_timeline
+    i = bisect.bisect_left(ats, CLOCK.now_ms())
+    past5 = list(events[max(0, i - 5):i])
+    next1 = events[i] if i < len(events) else None
+    next2 = events[i + 1] if i + 1 < len(events) else None
 
     return render_template("admin.html",
-                           n_tweets=n_tw, n_messages=n_msg,
+                           n_tweets=len(sc.tweets), n_messages=len(sc.messages),
                            past5=past5, next1=next1, next2=next2,
-                           enable_pms=ENABLE_PMS)
+                           enable_pms=ENABLE_PMS, clock=CLOCK.state)
 
 @app.route("/socialmedia")
 def socialmedia():
@@ -602,13 +2071,13 @@ def messagerie():
 
     if request.method == "POST":
         role = request.form.get("role")
-        if role not in ROLES:
+        if role not in SCENARIO.roles:
             flash("Rôle invalide")
             return redirect(url_for("messagerie"))
         session['role'] = role
         return redirect(url_for("messagerie"))
     role = session.get('role')
-    return render_template("messagerie.html", roles=ROLES, selected_role=role)
+    return render_template("messagerie.html", roles=SCENARIO.roles, selected_role=role)
 
 @app.route("/animateur_upcoming")
 def animateur_upcoming():
@@ -622,261 +2091,389 @@ def animateur_upcoming():
     except ValueError:
         limit = 3
 
-    now = datetime.now(tz=APP_TZ)
-    out = []
-    with STATE_LOCK:
-        # build meta map once
-        meta = {}
-        for r in RAW_ROWS:
-            if r.get("type") == "message":
-                rid = r.get("id", "")
-                if rid:
-                    meta[rid] = {
-                        "reaction": r.get("reaction attendue", "") or "",
-                        "commentaire": r.get("commentaire", "") or "",
-                    }
-
-        future = [m for m in MESSAGES if m["at"] >= now]
-        future.sort(key=lambda m: m["at"])
-        for m in future[:max(1, limit)]:
-            mm = meta.get(m["id"], {"reaction": "", "commentaire": ""})
-            out.append({
-                "id": m["id"],
-                "label": f"Message à {m.get('destinataire','')} (de {m.get('emetteur','')})",
-                "at": m["at"].isoformat(),
-                "at_ms": int(m["at"].timestamp() * 1000),
-                "emetteur": m.get("emetteur", ""),          # NEW
-                "destinataire": m.get("destinataire", ""),  # NEW
-                "stimuli": m.get("stimuli", ""),            # NEW
-                "reaction": mm["reaction"],
-                "commentaire": mm["commentaire"],
-            })
+    sc = SCENARIO
+    i = bisect.bisect_left(sc.message_ats, CLOCK.now_ms())
+    out = [
+        _animateur_payload(sc.messages[j], sc.message_views[j])
+        for j in range(i, min(i + max(1, limit), len(sc.messages)))
+    ]
 
     return app.response_class(app.json.dumps(out), mimetype="application/json")
 
-@app.route("/stream_animateur")
-def stream_animateur():
+def _due_range(ats: array, cursor: int, watermark: int) -> range:
     """
-    Streams *messages only* (stimuli) for the animator timeline, with metadata.
-    On connect: sends all past-due messages (once).
-    Then: streams each message at its due time.
-    """
-    def build_meta_by_id():
-        meta = {}
-        # Build once per emission window to avoid holding the lock too long
-        with STATE_LOCK:
-            for r in RAW_ROWS:
-                if r.get("type") == "message":
-                    rid = r.get("id", "")
-                    if rid:
-                        meta[rid] = {
-                            "reaction": r.get("reaction attendue", "") or "",
-                            "commentaire": r.get("commentaire", "") or "",
-                        }
-        return meta
+    Positions of a sorted timeline that became due between `cursor` and
+    `watermark`.
+    """
+    hi = bisect.bisect_right(ats, watermark)
+    return range(min(cursor, hi), hi)
 
-    def gen():
-        yield "event: ping\ndata: {}\n\n"
-        sent_ids = set()
-        meta_by_id = build_meta_by_id()
-
-        # 1) Send all past-due messages on connect
-        now = datetime.now(tz=APP_TZ)
-        due = []
-        with STATE_LOCK:
-            for m in MESSAGES:
-                if m["id"] in sent_ids:
-                    continue
-                if m["at"] <= now:
-                    meta = meta_by_id.get(m["id"], {"reaction": "", "commentaire": ""})
-                    due.append({
-                        "id": m["id"],
-                        "label": f"Message à {m.get('destinataire','')} (de {m.get('emetteur','')})",
-                        "at": m["at"].isoformat(),
-                        "at_ms": int(m["at"].timestamp() * 1000),
-                        "emetteur": m.get("emetteur",""),          # NEW
-                        "destinataire": m.get("destinataire",""),  # NEW
-                        "stimuli": m.get("stimuli",""),            # NEW
-                        "reaction": meta.get("reaction",""),
-                        "commentaire": meta.get("commentaire",""),
-                    })
-                    sent_ids.add(m["id"])
-        if due:
-            payload = app.json.dumps(due)
-            yield f"event: animateur\ndata: {payload}\n\n"
-
-        # 2) Stream new messages as they become due
-        while True:
-            now = datetime.now(tz=APP_TZ)
-            due = []
-            meta_by_id = build_meta_by_id()
-            with STATE_LOCK:
-                for m in MESSAGES:
-                    if m["id"] in sent_ids:
-                        continue
-                    if m["at"] <= now:
-                        meta = meta_by_id.get(m["id"], {"reaction": "", "commentaire": ""})
-                        due.append({
-                            "id": m["id"],
-                            "label": f"Message à {m.get('destinataire','')} (de {m.get('emetteur','')})",
-                            "at": m["at"].isoformat(),
-                            "at_ms": int(m["at"].timestamp() * 1000),
-                            "emetteur": m.get("emetteur",""),          # NEW
-                            "destinataire": m.get("destinataire",""),  # NEW
-                            "stimuli": m.get("stimuli",""),            # NEW
-                            "reaction": meta.get("reaction",""),
-                            "commentaire": meta.get("commentaire",""),
-                        })
-                        sent_ids.add(m["id"])
-            if due:
-                payload = app.json.dumps(due)
-                yield f"event: animateur\ndata: {payload}\n\n"
-            time.sleep(1)
+def _role_positions(sc: Scenario, role: Optional[str]):
+    """Sorted message positions visible to `role` (all of them when no role is given)."""
+    if not role:
+        return range(len(sc.messages))
+    return sc.role_index.get(role, sc.broadcast_index)
 
-    return app.response_class(gen(), mimetype="text/event-stream")
+# --- SSE stream sessions: per-connection state, independent of the server mode ---
+class StreamSession:
+    """
+    State of one SSE connection. `start()` returns the frames to send on
+    connect, `handle()` the frames for one scheduler notification. Both the
+    threaded Flask routes below and the asyncio server in asgi.py drive it.
 
-@app.route("/stream_tweets")
-def stream_tweets():
-    def gen():
-        yield "event: ping\ndata: {}\n\n"
+    Item frames carry an `id: <timeline version>.<cursor>` field. A client
+    reconnecting with that Last-Event-ID only receives what it missed; an
+    unknown or outdated id (scenario reloaded since) gets the full past-due
+    history again, which the pages dedupe by item id.
+
+    A live session that sees an incremental reload (see publish_scenario)
+    keeps its position instead: it resends the changed items already due and
+    a `retract` event listing the ids the page must drop.
 
-        # Send decompte state on connect
+    A `clock` event carries the scenario clock (see ScenarioClock) on connect
+    and whenever /admin changes it, so the pages run the same time.
+    """
+    kinds: tuple = ()
+    timeline = ""
+    event = ""
+    retract_event = "retract"
+    fragments = ""  # Scenario field holding the serialized items of this stream
+    with_decompte = False
+
+    def __init__(self, last_event_id: Optional[str] = None):
+        self.version, self.cursor = self._parse_event_id(last_event_id)
+        self.watermark = 0
+        self.last_decompte_key = -1  # end (epoch ms) of the countdown last sent, None: none
+        self.clock_state = None
+        self.live = False  # everything due up to self.watermark was delivered
+
+    @staticmethod
+    def _parse_event_id(value: Optional[str]) -> tuple:
+        try:
+            version, cursor = (value or "").strip().split(".")
+            return int(version), max(0, int(cursor))
+        except ValueError:
+            return None, 0
+
+    def start(self, watermark: int) -> List[bytes]:
+        frames = [b"event: ping\ndata: {}\n\n"] + self._clock_frames()
+        if self.with_decompte:
+            frames.extend(self._decompte_frames())
+        frames.extend(self._deliver(watermark))
+        return frames
+
+    def handle(self, kind: str, data) -> List[bytes]:
+        if kind == "decompte":
+            return self._decompte_frames()
+        if kind == "reload":
+            return self._clock_frames() + self._deliver(data)
+        return self._deliver(data)
+
+    def _clock_frames(self) -> List[bytes]:
+        state = CLOCK.state
+        if state is self.clock_state:
+            return []
+        self.clock_state = state
+        return [f"event: clock\ndata: {app.json.dumps(CLOCK.payload())}\n\n".encode("utf-8")]
+
+    def _decompte_frames(self) -> List[bytes]:
+        key = _active_decompte_end_ms(CLOCK.now_ms())
+        if key == self.last_decompte_key:
+            return []
+        self.last_decompte_key = key
         ev, data = _sse_decompte_event()
-        yield f"event: {ev}\ndata: {data}\n\n"
+        return [f"event: {ev}\ndata: {data}\n\n".encode("utf-8")]
+
+    def _deliver(self, watermark: int) -> List[bytes]:
+        sc = SCENARIO
+        version = getattr(sc, f"{self.timeline}_version")
+        frames: List[bytes] = []
+        fragments: List[bytes] = []
+        if self.version != version:
+            delta = self._changes_since(sc) if self.live else None
+            self.version = version
+            if delta is None:
+                # Fresh connection, stale Last-Event-ID or replaced scenario
+                self.cursor = 0
+            else:
+                frames, fragments = self._resync(sc, *delta)
+        # a rewound clock never takes back what was delivered
+        self.watermark = max(self.watermark, watermark)
+        fragments.extend(self._collect(sc))
+        self.live = True
+        if fragments:
+            frames.append(_sse_frame(self.event, fragments, self._frame_id()))
+        return frames
+
+    def _frame_id(self) -> str:
+        return f"{self.version}.{self.cursor}"
+
+    def _positions(self, sc: Scenario):
+        """Sorted timeline positions this session streams."""
+        return range(len(getattr(sc, f"{self.timeline}_ats")))
+
+    def _collect(self, sc: Scenario) -> List[bytes]:
+        """Advance the cursor to the watermark, return the new fragments of `sc`."""
+        ats = getattr(sc, f"{self.timeline}_ats")
+        due = _due_range(ats, self.cursor, self.watermark)
+        self.cursor = max(self.cursor, due.stop)
+        positions = self._positions(sc)
+        lo = bisect.bisect_left(positions, due.start)
+        hi = bisect.bisect_left(positions, due.stop, lo)
+        if hi > lo and self.live:  # pushed live, not replayed on connect
+            DELIVERY_LAG.observe(CLOCK.lag(ats[positions[hi - 1]]), self.timeline)
+        items = getattr(sc, self.fragments)
+        return [items[i] for i in positions[lo:hi]]
+
+    def _changes_since(self, sc: Scenario) -> Optional[tuple]:
+        """(changed ids, removed ids) between our version and `sc`, or None if not chained."""
+        chain = getattr(sc, f"{self.timeline}_changes")
+        for i, (base, _, _) in enumerate(chain):
+            if base == self.version:
+                changed = frozenset().union(*(step[1] for step in chain[i:]))
+                removed = frozenset().union(*(step[2] for step in chain[i:]))
+                return changed, removed
+        return None
+
+    def _resync(self, sc: Scenario, changed: frozenset, removed: frozenset) -> tuple:
+        """
+        Carry a live session over an incremental reload: move the cursor to
+        the same watermark in the new timeline and return (retract frames,
+        fragments of the changed items already due).
+        """
+        self.cursor = bisect.bisect_right(getattr(sc, f"{self.timeline}_ats"), self.watermark)
+        positions = self._positions(sc)
+        id_index = getattr(sc, f"{self.timeline}_id_index")
+        resend, sent = [], set()
+        for item_id in changed:
+            for pos in id_index.get(item_id, ()):
+                i = bisect.bisect_left(positions, pos)
+                if pos < self.cursor and i < len(positions) and positions[i] == pos:
+                    resend.append(pos)
+                    sent.add(item_id)
+        resend.sort()
+        items = getattr(sc, self.fragments)
+        gone = sorted((changed | removed) - sent)
+        frames = []
+        if gone:
+            frames.append((f"event: {self.retract_event}\nid: {self._frame_id()}\ndata: "
+                           f"{app.json.dumps(gone)}\n\n").encode("utf-8"))
+        return frames, [items[pos] for pos in resend]
+
+
+class TweetStreamSession(StreamSession):
+    kinds = ("tweet", "decompte")
+    timeline = "tweet"
+    event = "tweet"
+    fragments = "tweet_json"
+    with_decompte = True
+
+
+class MessageStreamSession(StreamSession):
+    kinds = ("message", "decompte")
+    timeline = "message"
+    event = "message"
+    fragments = "message_json"
+    with_decompte = True
+
+    def __init__(self, role: Optional[str], last_event_id: Optional[str] = None):
+        super().__init__(last_event_id)
+        self.role = role
+
+    def _positions(self, sc: Scenario):
+        return _role_positions(sc, self.role)
+
+
+class AnimateurStreamSession(StreamSession):
+    kinds = ("message",)
+    timeline = "message"
+    event = "animateur"
+    fragments = "animateur_json"
+
+
+class MultiplexSession(StreamSession):
+    """
+    Several topics interleaved on one connection (see /stream):
+      - tweets, messages (for `role`), animateur: one child session each,
+        whose events keep their names; retracts become `<event>_retract`
+      - decompte: a single countdown state machine for the connection
+    The event id concatenates the children's `<version>.<cursor>` with "_",
+    in topic order, so a reconnect resumes every topic where it stopped.
+    """
+    TOPICS = ("tweets", "messages", "animateur", "decompte")
+
+    def __init__(self, topics: List[str], role: Optional[str] = None, last_event_id: Optional[str] = None):
+        super().__init__()
+        unknown = [topic for topic in topics if topic not in self.TOPICS]
+        if unknown or not topics:
+            raise ValueError(f"Topic(s) inconnu(s): {', '.join(unknown) or '(aucun)'}")
+        self.with_decompte = "decompte" in topics
+        self.role = role if "messages" in topics else None
+        names = [topic for topic in self.TOPICS if topic in topics and topic != "decompte"]
+        ids = (last_event_id or "").split("_")
+        if len(ids) != len(names):
+            ids = [None] * len(names)
+        self.children: List[StreamSession] = []
+        for name, child_id in zip(names, ids):
+            if name == "messages":
+                child = MessageStreamSession(role, child_id)
+            elif name == "tweets":
+                child = TweetStreamSession(child_id)
+            else:
+                child = AnimateurStreamSession(child_id)
+            child.with_decompte = False
+            child.retract_event = f"{child.event}_retract"
+            child._frame_id = self._frame_id  # frames carry the composite id
+            self.children.append(child)
+        kinds = {kind for child in self.children for kind in child.kinds if kind != "decompte"}
+        if self.with_decompte:
+            kinds.add("decompte")
+        self.kinds = tuple(sorted(kinds))
+
+    def _frame_id(self) -> str:
+        return "_".join(f"{child.version or 0}.{child.cursor}" for child in self.children)
+
+    def start(self, watermark: int) -> List[bytes]:
+        frames = [b"event: ping\ndata: {}\n\n"] + self._clock_frames()
+        if self.with_decompte:
+            frames.extend(self._decompte_frames())
+        for child in self.children:
+            frames.extend(child._deliver(watermark))
+        return frames
+
+    def handle(self, kind: str, data) -> List[bytes]:
+        if kind == "decompte":
+            return self._decompte_frames() if self.with_decompte else []
+        frames = self._clock_frames() if kind == "reload" else []
+        for child in self.children:
+            if kind == "reload" or kind in child.kinds:
+                frames.extend(child._deliver(data))
+        return frames
+
+
+def stream_labels(endpoint: str, session: StreamSession) -> tuple:
+    """
+    STREAMS_OPEN labels of a connection. The role comes from the query string:
+    anything but a role of the loaded scenario is reported as "other", so
+    clients cannot mint series.
+    """
+    role = getattr(session, "role", None) or ""
+    if role and role not in SCENARIO.roles:
+        role = "other"
+    return endpoint, role
 
-        sent_ids = set()
-        last_decompte_key = None  # track state changes
+def _serve_session(session: StreamSession):
+    """
+    Threaded driver: one worker thread per connection, blocked on its queue.
+    Idle streams write a keepalive comment every STREAM_HEARTBEAT seconds, so
+    a closed socket fails the write and frees the thread.
+    """
+    endpoint = request.path
+    ip = request.remote_addr or ""
 
-        # Send past tweets
-        now = datetime.now(tz=APP_TZ)
-        due = []
-        with STATE_LOCK:
-            for t in TWEETS:
-                if t["id"] in sent_ids:
+    def gen():
+        # Everything is acquired inside the generator: its finally only runs once started
+        if STREAM_SLOTS.acquire(ip) is not None:
+            yield REFUSED_FRAME
+            return
+        q, watermark = SCHEDULER.subscribe(session.kinds)
+        labels = stream_labels(endpoint, session)
+        STREAMS_OPEN.inc(*labels)
+        try:
+            frames = session.start(watermark)
+            while True:
+                count_frames(endpoint, frames)
+                yield from frames
+                try:
+                    kind, data = q.get(timeout=STREAM_HEARTBEAT or None)
+                except queue.Empty:
+                    frames = [HEARTBEAT_FRAME]
                     continue
-                if t["at"] <= now:
-                    due.append({
-                        "id": t["id"],
-                        "emetteur": t["emetteur"],
-                        "texte": t["texte"],
-                        "at": t["at"].isoformat(),
-                        "at_ms": int(t["at"].timestamp() * 1000),
-                    })
-                    sent_ids.add(t["id"])
-        if due:
-            payload = app.json.dumps(due)
-            yield f"event: tweet\ndata: {payload}\n\n"
-
-        # Stream new tweets + decompte state changes
-        while True:
-            # Emit decompte updates if changed
-            end_dt = get_active_decompte_end()
-            key = end_dt.isoformat() if end_dt else "none"
-            if key != last_decompte_key:
-                last_decompte_key = key
-                ev, data = _sse_decompte_event()
-                yield f"event: {ev}\ndata: {data}\n\n"
-
-            now = datetime.now(tz=APP_TZ)
-            due = []
-            with STATE_LOCK:
-                for t in TWEETS:
-                    if t["id"] in sent_ids:
-                        continue
-                    if t["at"] <= now:
-                        due.append({
-                            "id": t["id"],
-                            "emetteur": t["emetteur"],
-                            "texte": t["texte"],
-                            "at": t["at"].isoformat(),
-                            "at_ms": int(t["at"].timestamp() * 1000),
-                        })
-                        sent_ids.add(t["id"])
-            if due:
-                payload = app.json.dumps(due)
-                yield f"event: tweet\ndata: {payload}\n\n"
-            time.sleep(1)
+                if kind == "overflow":
+                    return
+                frames = session.handle(kind, data)
+        finally:
+            STREAMS_OPEN.dec(*labels)
+            SCHEDULER.unsubscribe(q)
+            STREAM_SLOTS.release(ip)
     return app.response_class(gen(), mimetype="text/event-stream")
 
-@app.route("/stream_messages")
-def stream_messages():
-    role = request.args.get('role')
+@app.route("/stream")
+def stream():
+    """
+    One SSE connection for every topic a page needs:
+    /stream?topics=tweets,messages,animateur,decompte (&role= for messages).
+    """
+    topics = [topic.strip() for topic in request.args.get("topics", "").split(",") if topic.strip()]
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    try:
+        session_ = MultiplexSession(topics, request.args.get("role"), last_id)
+    except ValueError as e:
+        return app.response_class(app.json.dumps({"error": str(e)}), mimetype="application/json", status=400)
+    return _serve_session(session_)
 
-    def is_for_role(m, role):
-        dest = (m.get("destinataire") or "").strip()
-        if not role:
-            return True
-        if dest.casefold() == "tous":
-            return True
-        # Handle multiple destinataires separated by newline
-        for d in dest.split('\n'):
-            d = d.strip()
-            if d == role:
-                return True
-        return False
+@app.route("/stream_animateur")
+def stream_animateur():
+    """
+    Streams *messages only* (stimuli) for the animator timeline, with metadata.
+    On connect: sends all past-due messages (once).
+    Then: streams each message at its due time, as pushed by the scheduler.
+    """
+    return _serve_session(AnimateurStreamSession(request.headers.get("Last-Event-ID")))
 
-    def gen():
-        yield "event: ping\ndata: {}\n\n"
+@app.route("/stream_tweets")
+def stream_tweets():
+    return _serve_session(TweetStreamSession(request.headers.get("Last-Event-ID")))
 
-        # Send decompte state on connect
-        ev, data = _sse_decompte_event()
-        yield f"event: {ev}\ndata: {data}\n\n"
+@app.route("/stream_messages")
+def stream_messages():
+    # `last_id` lets a page that already fetched /messages skip the history replay
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    return _serve_session(MessageStreamSession(request.args.get('role'), last_id))
 
-        sent_ids = set()
-        last_decompte_key = None
+MESSAGES_PAGE_MAX = 500
 
-        # past messages
-        now = datetime.now(tz=APP_TZ)
-        due = []
-        with STATE_LOCK:
-            for m in MESSAGES:
-                if m["id"] in sent_ids:
-                    continue
-                if m["at"] <= now and is_for_role(m, role):
-                    due.append({
-                        "id": m["id"],
-                        "emetteur": m["emetteur"],
-                        "destinataire": m.get("destinataire", ""),
-                        "stimuli": m["stimuli"],
-                        "at": m["at"].isoformat(),
-                        "at_ms": int(m["at"].timestamp()*1000),
-                    })
-                    sent_ids.add(m["id"])
-        if due:
-            payload = app.json.dumps(due)
-            yield f"event: message\ndata: {payload}\n\n"
-
-        # new messages + decompte changes
-        while True:
-            # Emit decompte updates if changed
-            end_dt = get_active_decompte_end()
-            key = end_dt.isoformat() if end_dt else "none"
-            if key != last_decompte_key:
-                last_decompte_key = key
-                ev, data = _sse_decompte_event()
-                yield f"event: {ev}\ndata: {data}\n\n"
-
-            now = datetime.now(tz=APP_TZ)
-            due = []
-            with STATE_LOCK:
-                for m in MESSAGES:
-                    if m["id"] in sent_ids:
-                        continue
-                    if m["at"] <= now and is_for_role(m, role):
-                        due.append({
-                            "id": m["id"],
-                            "emetteur": m["emetteur"],
-                            "destinataire": m.get("destinataire", ""),
-                            "stimuli": m["stimuli"],
-                            "at": m["at"].isoformat(),
-                            "at_ms": int(m["at"].timestamp()*1000),
-                        })
-                        sent_ids.add(m["id"])
-            if due:
-                payload = app.json.dumps(due)
-                yield f"event: message\ndata: {payload}\n\n"
-            time.sleep(1)
-    return app.response_class(gen(), mimetype='text/event-stream')
+@app.route("/messages")
+def messages_history():
+    """
+    Past-due messages visible to `role`, oldest first, as a JSON array.
+    Query params:
+      - role: recipient role (all messages when omitted)
+      - since (default 0): cursor returned in X-Next-Since by the previous page
+      - limit (int, default 100, max 500): page size
+    The cursor has the `<version>.<position>` form of the SSE event ids: it can
+    be handed to /stream_messages as `last_id`, and one from an older scenario
+    restarts at the beginning. The ETag is the cursor this page ends at, so a
+    page only changes when the scenario is reloaded or messages become due;
+    clients revalidate it with If-None-Match and get a 304 otherwise.
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", "100")), 1), MESSAGES_PAGE_MAX)
+    except ValueError:
+        limit = 100
+
+    sc = SCENARIO
+    version, cursor = StreamSession._parse_event_id(request.args.get("since"))
+    if version != sc.message_version:
+        cursor = 0
+    due = _due_range(sc.message_ats, cursor, CLOCK.now_ms())
+    positions = _role_positions(sc, request.args.get("role"))
+    lo = bisect.bisect_left(positions, due.start)
+    hi = bisect.bisect_left(positions, due.stop, lo)
+    next_cursor = due.stop
+    if hi - lo > limit:
+        hi = lo + limit
+        next_cursor = positions[hi - 1] + 1
+    next_since = f"{sc.message_version}.{next_cursor}"
+
+    resp = app.response_class(
+        b"[" + b",".join(sc.message_json[i] for i in positions[lo:hi]) + b"]",
+        mimetype="application/json",
+    )
+    resp.set_etag(next_since)
+    resp.headers["X-Next-Since"] = next_since
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
 
 
 @app.route("/observateur", methods=["GET", "POST"])
@@ -899,50 +2496,12 @@ def observateur():
         )
 
     # ---- authenticated: render your observateur page (notes) ----
-    # Build the same context you already use (past3/next1/next2/APP_ID, etc.)
-    # Example skeleton:
-    now = datetime.now(tz=APP_TZ)
-    with STATE_LOCK:
-        future_msgs = sorted([m for m in MESSAGES if m["at"] >= now], key=lambda m: m["at"])
-        past_msgs   = sorted([m for m in MESSAGES if m["at"] <  now], key=lambda m: m["at"])
-
-    past3 = [
-        {
-            "id": m["id"],
-            "at": m["at"].isoformat(),
-            "at_ms": int(m["at"].timestamp() * 1000),
-            "emetteur": m.get("emetteur",""),
-            "destinataire": m.get("destinataire",""),
-            "stimuli": m.get("stimuli",""),
-            "label": f"Message à {m.get('destinataire','')} (de {m.get('emetteur','')})",
-        }
-        # for m in past_msgs[-3:]
-        for m in past_msgs
-    ]
-    next1 = None
-    next2 = None
-    if future_msgs:
-        m0 = future_msgs[0]
-        next1 = {
-            "id": m0["id"],
-            "at": m0["at"].isoformat(),
-            "at_ms": int(m0["at"].timestamp() * 1000),
-            "emetteur": m0.get("emetteur",""),
-            "destinataire": m0.get("destinataire",""),
-            "stimuli": m0.get("stimuli",""),
-            "label": f"Message à {m0.get('destinataire','')} (de {m0.get('emetteur','')})",
-        }
-        if len(future_msgs) > 1:
-            m1 = future_msgs[1]
-            next2 = {
-                "id": m1["id"],
-                "at": m1["at"].isoformat(),
-                "at_ms": int(m1["at"].timestamp() * 1000),
-                "emetteur": m1.get("emetteur",""),
-                "destinataire": m1.get("destinataire",""),
-                "stimuli": m1.get("stimuli",""),
-                "label": f"Message à {m1.get('destinataire','')} (de {m1.get('emetteur','')})",
-            }
+    sc = SCENARIO
+    i = bisect.bisect_left(sc.message_ats, CLOCK.now_ms())
+    views = sc.message_views
+    past3 = list(views[:i])
+    next1 = views[i] if i < len(views) else None
+    next2 = views[i + 1] if i + 1 < len(views) else None
 
     return render_template(
         "observateur.html",
@@ -958,20 +2517,44 @@ def messagerie_change():
     session.pop("role", None)
     return redirect(url_for("messagerie"))
 
+@app.route("/metrics")
+def metrics():
+    """Prometheus text exposition of the metrics above, plus scenario gauges read at scrape time."""
+    sc = SCENARIO
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines += [
+        "# HELP murail_scenario_items Items loaded per timeline.",
+        "# TYPE murail_scenario_items gauge",
+        f'murail_scenario_items{{timeline="tweet"}} {len(sc.tweets)}',
+        f'murail_scenario_items{{timeline="message"}} {len(sc.messages)}',
+        "# HELP murail_scenario_version Version (content digest) of each timeline.",
+        "# TYPE murail_scenario_version gauge",
+        f'murail_scenario_version{{timeline="tweet"}} {sc.tweet_version}',
+        f'murail_scenario_version{{timeline="message"}} {sc.message_version}',
+    ]
+    return app.response_class("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
 @app.route("/health")
 def health():
     """Health check endpoint for Docker and load balancers."""
-    with STATE_LOCK:
-        n_tweets = len(TWEETS)
-        n_messages = len(MESSAGES)
+    sc = SCENARIO
+    n_tweets = len(sc.tweets)
+    n_messages = len(sc.messages)
     
     status = {
         "status": "healthy",
         "timestamp": datetime.now(tz=APP_TZ).isoformat(),
+        "scenario_time": datetime.fromtimestamp(CLOCK.now(), tz=APP_TZ).isoformat(),
+        "clock_speed": CLOCK.state.speed,
+        "clock_paused": CLOCK.state.paused,
         "app_id": APP_ID,
         "tweets_loaded": n_tweets,
         "messages_loaded": n_messages,
         "timezone": TZ,
+        "worker": WORKER_ID,
+        "pubsub": PUBSUB_BACKEND,
     }
     return app.response_class(
         app.json.dumps(status),
@@ -983,22 +2566,78 @@ os.makedirs(os.path.dirname(CHRONOGRAMME), exist_ok=True)
 if ENABLE_PMS:
     os.makedirs(os.path.dirname(PMS), exist_ok=True)
 
-# Load Chronogramme (messages, decompte, raw events)
-if os.path.exists(CHRONOGRAMME):
+def _load_startup(channel: str, path: str) -> None:
+    """
+    Boot from the latest upload shared on the pub/sub backend, else from the
+    journal's last load (already parsed, same version), else from disk. The
+    journaled load is skipped when the file on disk changed since it was
+    recorded: an edit made while the app was down wins, parsed against the
+    journaled anchor so a restart after midnight keeps the exercise day.
+    """
+    try:
+        payload = PUBSUB.latest(channel)
+    except Exception as e:
+        app.logger.warning(f"Pub/sub {PUBSUB_BACKEND} indisponible: {e}")
+        payload = None
+    try:
+        restored = JOURNAL.last_load(channel) if JOURNAL is not None else None
+    except Exception as e:
+        app.logger.warning(f"Journal {JOURNAL_FILE} illisible: {e}")
+        restored = None
     try:
-        with open(CHRONOGRAMME, 'rb') as f:
-            load_excel(f)
-        extract_roles_from_messages()  # Extract roles after loading
+        on_disk = _file_digest(path)
+        if (restored is not None and (payload is None or hashlib.sha1(payload).hexdigest() == restored[1])
+                and (on_disk is None or on_disk == restored[2])):
+            version, digest, _, parsed = restored
+            SCENARIO_CHANNELS[channel][2](parsed, version=version)
+            _APPLIED_DIGESTS[channel] = digest
+            app.logger.info(f"'{channel}' restauré depuis le journal {JOURNAL_FILE}")
+            return
+        anchor = None
+        if payload is None:
+            if not os.path.exists(path):
+                return
+            with open(path, 'rb') as f:
+                payload = f.read()
+            if restored is not None:
+                anchor = dtparser.isoparse(restored[3]["anchor"])
+        apply_payload(channel, payload, anchor)
     except Exception as e:
-        app.logger.warning(f"Impossible de charger {CHRONOGRAMME}: {e}")
+        app.logger.warning(f"Impossible de charger {path}: {e}")
 
-# Load PMS (tweets) - only if ENABLE_PMS is True
-if ENABLE_PMS and os.path.exists(PMS):
+def _load_clock() -> None:
+    """Boot on the clock shared on the pub/sub backend, else the one journaled today, else CLOCK_*."""
     try:
-        with open(PMS, 'rb') as f:
-            load_pms(f)
+        payload = PUBSUB.latest("clock")
+        state = ClockState.from_json(payload) if payload is not None else None
+        if state is None and JOURNAL is not None:
+            state = JOURNAL.last_clock()
     except Exception as e:
-        app.logger.warning(f"Impossible de charger {PMS}: {e}")
+        app.logger.warning(f"Horloge du scénario non restaurée: {e}")
+        state = None
+    if state is not None:
+        CLOCK.state = state
+
+_load_clock()
+
+# Load Chronogramme (messages, decompte, raw events)
+_load_startup("chronogramme", CHRONOGRAMME)
+
+# Load PMS (tweets) - only if ENABLE_PMS is True
+if ENABLE_PMS:
+    _load_startup("pms", PMS)
+
+PUBSUB.start(_on_pubsub)
+
+if JOURNAL is not None:
+    JOURNAL.start()
+
+if SCENARIO_WATCH_INTERVAL > 0:
+    watch_scenario_files({channel: path for channel, path in SCENARIO_FILES.items()
+                          if channel != "pms" or ENABLE_PMS}, SCENARIO_WATCH_INTERVAL)
+
+if I18N_WATCH_INTERVAL > 0:
+    watch_translations(I18N_WATCH_INTERVAL)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=DEBUG)
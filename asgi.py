@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optional asyncio serving mode.
+
+The SSE endpoints are served as coroutines awaiting a shared in-loop event bus,
+so one process can hold thousands of open EventSource connections without a
+thread per client. Every other route is handed to the Flask app unchanged.
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+from __future__ import annotations
+import asyncio
+from typing import Callable, Dict, Optional, Set
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import (
+    app, SCHEDULER, STREAMS_OPEN, StreamSession, count_frames, stream_labels, coalesce_notification,
+    STREAM_HEARTBEAT, STREAM_QUEUE_MAX, STREAM_OVERFLOW, STREAM_OVERFLOWS, STREAM_SLOTS,
+    OVERFLOW_ITEM, HEARTBEAT_FRAME, REFUSED_FRAME,
+    TweetStreamSession, MessageStreamSession, AnimateurStreamSession, MultiplexSession,
+)
+
+
+class AsyncEventBus:
+    """
+    Bridges the scheduler thread into the event loop: a single scheduler
+    subscription, one call_soon_threadsafe per notification, then an in-loop
+    fan-out to each connection's asyncio.Queue.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[asyncio.Queue, frozenset] = {}
+
+    def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        SCHEDULER.subscribe(("tweet", "message", "decompte"), q=self)
+
+    def stop(self) -> None:
+        SCHEDULER.unsubscribe(self)
+        self._loop = None
+
+    # Called from the scheduler thread
+    def put(self, item) -> None:
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._dispatch, item)
+
+    def _dispatch(self, item) -> None:
+        kind = item[0]
+        for q, kinds in self._queues.items():
+            if kind in kinds:
+                self._offer(q, item)
+
+    @staticmethod
+    def _offer(q: asyncio.Queue, item) -> None:
+        """Same overflow policy as app.StreamQueue: coalesce by kind, or disconnect when full."""
+        if STREAM_OVERFLOW == "disconnect":
+            try:
+                q.put_nowait(item)
+            except asyncio.QueueFull:
+                STREAM_OVERFLOWS.inc(STREAM_OVERFLOW)
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(OVERFLOW_ITEM)
+            return
+        if q.empty():
+            q.put_nowait(item)
+            return
+        pending = []
+        while not q.empty():
+            pending.append(q.get_nowait())
+        if coalesce_notification(pending, item):
+            STREAM_OVERFLOWS.inc(STREAM_OVERFLOW)
+        else:
+            pending.append(item)
+        for p in pending:
+            q.put_nowait(p)
+
+    def subscribe(self, kinds) -> tuple:
+        self.start()
+        # "drop" coalesces by kind, so only "disconnect" needs the bound
+        q: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_MAX if STREAM_OVERFLOW == "disconnect" else 0)
+        self._queues[q] = frozenset(kinds) | {"reload"}
+        return q, SCHEDULER.watermark
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        self._queues.pop(q, None)
+
+
+BUS = AsyncEventBus()
+
+# path -> session factory(query args, Last-Event-ID)
+STREAMS: Dict[str, Callable[[dict, Optional[str]], StreamSession]] = {
+    "/stream_tweets": lambda args, last_id: TweetStreamSession(last_id),
+    "/stream_messages": lambda args, last_id: MessageStreamSession(
+        (args.get("role") or [None])[0], last_id or (args.get("last_id") or [None])[0]),
+    "/stream_animateur": lambda args, last_id: AnimateurStreamSession(last_id),
+    "/stream": lambda args, last_id: MultiplexSession(
+        [topic.strip() for topic in (args.get("topics") or [""])[0].split(",") if topic.strip()],
+        (args.get("role") or [None])[0], last_id or (args.get("last_id") or [None])[0]),
+}
+
+flask_app = WsgiToAsgi(app)
+
+
+async def _serve_stream(session: StreamSession, endpoint: str, scope, receive, send) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-store, no-cache, must-revalidate, max-age=0"),
+        ],
+    })
+
+    async def pump(q: asyncio.Queue, watermark: int) -> None:
+        frames = session.start(watermark)
+        while True:
+            if frames:
+                count_frames(endpoint, frames)
+                await send({"type": "http.response.body", "body": b"".join(frames), "more_body": True})
+            try:
+                kind, data = await asyncio.wait_for(q.get(), STREAM_HEARTBEAT or None)
+            except asyncio.TimeoutError:
+                frames = [HEARTBEAT_FRAME]
+                continue
+            if kind == "overflow":
+                return
+            frames = session.handle(kind, data)
+
+    async def wait_disconnect() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    ip = (scope.get("client") or ("",))[0]
+    if STREAM_SLOTS.acquire(ip) is not None:
+        await send({"type": "http.response.body", "body": REFUSED_FRAME})
+        return
+    q, watermark = BUS.subscribe(session.kinds)
+    labels = stream_labels(endpoint, session)
+    STREAMS_OPEN.inc(*labels)
+    pumping = asyncio.ensure_future(pump(q, watermark))
+    tasks: Set[asyncio.Task] = {pumping, asyncio.ensure_future(wait_disconnect())}
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if not task.cancelled() and task.exception() and not isinstance(task.exception(), OSError):
+                raise task.exception()
+        if pumping in done:
+            # Dropped for falling behind: end the response, the client reconnects
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        STREAMS_OPEN.dec(*labels)
+        BUS.unsubscribe(q)
+        STREAM_SLOTS.release(ip)
+
+
+async def application(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                BUS.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                BUS.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] in STREAMS:
+        args = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        headers = dict(scope.get("headers") or [])
+        last_id = headers.get(b"last-event-id", b"").decode("latin-1") or None
+        try:
+            session = STREAMS[scope["path"]](args, last_id)
+        except ValueError as e:
+            body = app.json.dumps({"error": str(e)}).encode("utf-8")
+            await send({"type": "http.response.start", "status": 400,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        await _serve_stream(session, scope["path"], scope, receive, send)
+        return
+
+    await flask_app(scope, receive, send)
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load-test harness: plays an exercise against many SSE clients and reports
+delivery latency, server CPU / memory and dropped connections.
+
+    python loadtest.py                                    # Sample/chronogramme.xlsx, played 60x faster
+    python loadtest.py --rows 2000 --messages 500 --tweets 500 --animateurs 10
+    python loadtest.py --server asgi --messages 2000      # uvicorn asgi:application
+    python loadtest.py --url http://host:5000 --duration 300 --roles "RH,Cyber"
+
+Unless --url targets a running instance, the app is started as a subprocess
+on a copy of the scenario rebased to begin right after all clients are
+connected, so every item is delivered live during the run. Latency is the
+receive time minus the item's scheduled `at`; items already due when a client
+connected (history replay) are counted separately.
+
+Clients are plain asyncio HTTP connections (no extra dependency) behaving like
+EventSource: on a dropped stream they reconnect after 1s with Last-Event-ID.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ITEM_EVENTS = {"message", "tweet", "animateur"}
+
+
+# --- Scenario preparation ---
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec="milliseconds")
+
+def _seconds_of_day(val) -> Optional[float]:
+    """Time of day of a Chronogramme 'horaire' cell, in seconds (None if unreadable)."""
+    if hasattr(val, "hour"):
+        return val.hour * 3600 + val.minute * 60 + val.second
+    if isinstance(val, (int, float)) and 0 <= val < 1:
+        return float(val) * 86400
+    parts = str(val).strip().split(":")
+    try:
+        h, m, s = (list(map(float, parts)) + [0, 0])[:3]
+    except ValueError:
+        return None
+    return h * 3600 + m * 60 + s
+
+def rebase_workbook(src: str, dest: str, start: float, speed: float) -> List[str]:
+    """
+    Copy a Chronogramme workbook to CSV with its horaires shifted so the first
+    one falls at `start` and gaps divided by `speed`. Returns its roles.
+    """
+    import pandas as pd  # already an app dependency
+
+    df = pd.read_excel(src, dtype=object)
+    cols = {c.strip().lower(): c for c in df.columns}
+    offsets = [_seconds_of_day(v) for v in df[cols["horaire"]]]
+    first = min(o for o in offsets if o is not None)
+    df[cols["horaire"]] = [_iso(start + (o - first) / speed) if o is not None else "" for o in offsets]
+    df.to_csv(dest, index=False)
+
+    roles = set()
+    if "destinataire" in cols:
+        for dest_cell in df[cols["destinataire"]].dropna():
+            for role in str(dest_cell).split("\n"):
+                role = role.strip()
+                if role and role.lower() != "tous":
+                    roles.add(role)
+    return sorted(roles)
+
+def synthetic_scenario(chrono: str, pms: str, rows: int, tweet_rows: int, n_roles: int,
+                       start: float, span: float) -> List[str]:
+    """Write an N-row Chronogramme (+ PMS) spread evenly over `span` seconds."""
+    roles = [f"Role{i + 1}" for i in range(n_roles)]
+    with open(chrono, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "horaire", "type", "emetteur", "destinataire", "stimuli", "reaction attendue", "commentaire"])
+        for i in range(rows):
+            dest = "Tous" if i % 10 == 0 else roles[i % n_roles]
+            w.writerow([i + 1, _iso(start + span * i / max(rows, 1)), "message", f"Emetteur {i % 7}", dest,
+                        f"Stimulus {i + 1} " + "x" * 200, "Réaction attendue", "Commentaire"])
+    with open(pms, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["horaire", "emetteur", "stimuli"])
+        for i in range(tweet_rows):
+            w.writerow([_iso(start + span * i / max(tweet_rows, 1)), f"@compte{i % 13}", f"Tweet {i + 1} #exercice"])
+    return roles
+
+
+# --- Server under test ---
+def start_server(kind: str, port: int, env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    """
+    Start the app and wait for /health. Its stderr goes to `log_path`: a pipe
+    nobody reads would block the server once its logs fill the pipe buffer.
+    """
+    if kind == "asgi":
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:application", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "app.py"]
+    with open(log_path, "wb") as log:
+        proc = subprocess.Popen(cmd, cwd=HERE, env={**os.environ, **env},
+                                stdout=subprocess.DEVNULL, stderr=log)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            with open(log_path, encoding="utf-8", errors="replace") as f:
+                raise RuntimeError(f"le serveur s'est arrêté au démarrage:\n{f.read()}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as r:
+                if r.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("le serveur n'a pas répondu sur /health en 60s")
+
+class ProcessMonitor:
+    """Samples CPU and RSS of a local process from /proc once per second."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.samples: List[tuple] = []  # (cpu %, rss MiB, threads)
+        self._tick = os.sysconf("SC_CLK_TCK")
+        self._page = os.sysconf("SC_PAGE_SIZE")
+
+    def _read(self) -> Optional[tuple]:
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu = (int(fields[11]) + int(fields[12])) / self._tick
+            rss = int(fields[21]) * self._page / 2**20
+            return time.monotonic(), cpu, rss, int(fields[17])
+        except (OSError, IndexError, ValueError):
+            return None
+
+    async def run(self) -> None:
+        prev = self._read()
+        while prev is not None:
+            await asyncio.sleep(1)
+            cur = self._read()
+            if cur is None:
+                return
+            self.samples.append((100 * (cur[1] - prev[1]) / (cur[0] - prev[0]), cur[2], cur[3]))
+            prev = cur
+
+
+# --- SSE clients ---
+class StreamStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.clients = 0
+        self.connected = 0
+        self.failed = 0      # clients that never got the response headers
+        self.dropped = 0     # stream closed by the server or the network mid-run
+        self.reconnects = 0
+        self.history = 0     # items already due at connect time
+        self.latencies: List[float] = []
+
+class StreamClient:
+    def __init__(self, stats: StreamStats, host: str, port: int, path: str):
+        self.stats = stats
+        self.host, self.port, self.path = host, port, path
+        self.last_id: Optional[str] = None
+        self.connected = False
+
+    async def run(self) -> None:
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=2**22)
+                headers = f"GET {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nAccept: text/event-stream\r\n"
+                if self.last_id:
+                    headers += f"Last-Event-ID: {self.last_id}\r\n"
+                writer.write((headers + "\r\n").encode("latin-1"))
+                await writer.drain()
+                status = await reader.readline()
+                if b" 200 " not in status:
+                    raise ConnectionError(status.decode("latin-1").strip() or "no response")
+                chunked = False
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    if line.lower().startswith(b"transfer-encoding:") and b"chunked" in line.lower():
+                        chunked = True
+                connected_at = time.time()
+                if not self.connected:
+                    self.stats.connected += 1
+                    self.connected = True
+                else:
+                    self.stats.reconnects += 1
+                await self._consume(self._lines(reader, chunked), connected_at)
+                self.stats.dropped += 1
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                # refused / bad status before the first connection: retried, counted
+                # as failed at the end of the run if it never gets through
+                if self.connected:
+                    self.stats.dropped += 1
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(1)  # EventSource default retry
+
+    @staticmethod
+    async def _lines(reader: asyncio.StreamReader, chunked: bool):
+        if not chunked:
+            while line := await reader.readline():
+                yield line
+            return
+        buf = b""
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                return
+            buf += await reader.readexactly(size)
+            await reader.readexactly(2)
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                yield line + b"\n"
+
+    async def _consume(self, lines, connected_at: float) -> None:
+        event, data = "message", []
+        async for raw in lines:
+            line = raw.rstrip(b"\r\n").decode("utf-8")
+            if line:
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "event":
+                    event = value
+                elif field == "data":
+                    data.append(value)
+                elif field == "id":
+                    self.last_id = value
+                continue
+            if event in ITEM_EVENTS and data:
+                now = time.time()
+                for item in json.loads("\n".join(data)):
+                    at = item.get("at_ms", 0) / 1000
+                    if at < connected_at:
+                        self.stats.history += 1
+                    else:
+                        self.stats.latencies.append(now - at)
+            event, data = "message", []
+
+
+# --- Report ---
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+def report(stats: List[StreamStats], monitor: Optional[ProcessMonitor], elapsed: float) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"duration_s": round(elapsed, 1), "streams": {}}
+    print(f"\nDurée: {elapsed:.1f}s")
+    print(f"{'flux':<12}{'clients':>8}{'connectés':>10}{'échecs':>8}{'coupés':>8}{'reconn.':>8}"
+          f"{'histo.':>9}{'live':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for s in stats:
+        ms = [v * 1000 for v in s.latencies]
+        row = {
+            "clients": s.clients, "connected": s.connected, "failed": s.failed, "dropped": s.dropped,
+            "reconnects": s.reconnects, "history_items": s.history, "live_items": len(ms),
+            "latency_ms": {"p50": _pct(ms, .5), "p95": _pct(ms, .95), "p99": _pct(ms, .99),
+                           "max": max(ms) if ms else float("nan")},
+        }
+        out["streams"][s.name] = row
+        lat = row["latency_ms"]
+        print(f"{s.name:<12}{s.clients:>8}{s.connected:>10}{s.failed:>8}{s.dropped:>8}{s.reconnects:>8}"
+              f"{s.history:>9}{len(ms):>9}{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}{lat['max']:>9.1f}")
+    if monitor is not None and monitor.samples:
+        cpu = [c for c, _, _ in monitor.samples]
+        rss = [r for _, r, _ in monitor.samples]
+        threads = [n for _, _, n in monitor.samples]
+        out["server"] = {"cpu_avg_pct": sum(cpu) / len(cpu), "cpu_max_pct": max(cpu),
+                         "rss_max_mib": max(rss), "threads_max": max(threads)}
+        print(f"Serveur: CPU moy. {out['server']['cpu_avg_pct']:.1f}% / max {max(cpu):.1f}%, "
+              f"RSS max {max(rss):.1f} MiB, threads max {max(threads)}")
+    return out
+
+
+# --- Main ---
+def _raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+async def run_clients(args, host: str, port: int, roles: List[str],
+                      monitor: Optional[ProcessMonitor], duration: float) -> List[StreamStats]:
+    plan = []
+    for i in range(args.messages):
+        role = roles[i % len(roles)] if roles else ""
+        plan.append(("messages", f"/stream_messages?role={quote(role)}"))
+    plan += [("tweets", "/stream_tweets")] * args.tweets
+    plan += [("animateur", "/stream_animateur")] * args.animateurs
+    stats = {name: StreamStats(name) for name in ("messages", "tweets", "animateur")}
+
+    tasks, clients = [], []
+    if monitor is not None:
+        tasks.append(asyncio.ensure_future(monitor.run()))
+    pause = args.ramp / max(len(plan), 1)
+    for name, path in plan:
+        stats[name].clients += 1
+        clients.append(StreamClient(stats[name], host, port, path))
+        tasks.append(asyncio.ensure_future(clients[-1].run()))
+        await asyncio.sleep(pause)
+    await asyncio.sleep(max(0.0, duration - args.ramp))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # refused, bad status or still waiting for the headers when the run ended
+    for client in clients:
+        if not client.connected:
+            client.stats.failed += 1
+    return [s for s in stats.values() if s.clients]
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Charge SSE simulant un exercice complet.")
+    p.add_argument("--url", help="instance déjà démarrée (sinon l'app est lancée en sous-processus)")
+    p.add_argument("--server", choices=("flask", "asgi"), default="flask", help="mode de service de l'app lancée")
+    p.add_argument("--port", type=int, default=5099)
+    p.add_argument("--scenario", default=os.path.join(HERE, "Sample", "chronogramme.xlsx"),
+                   help="Chronogramme rejoué (horaires décalés à maintenant)")
+    p.add_argument("--speed", type=float, default=60.0, help="accélération du Chronogramme rejoué")
+    p.add_argument("--rows", type=int, default=0, help="scénario synthétique de N messages au lieu de --scenario")
+    p.add_argument("--tweet-rows", type=int, default=None, help="tweets du scénario synthétique (défaut: --rows)")
+    p.add_argument("--n-roles", type=int, default=8, help="rôles du scénario synthétique")
+    p.add_argument("--span", type=float, default=60.0, help="durée de diffusion du scénario synthétique (s)")
+    p.add_argument("--roles", default="", help="rôles des clients messagerie avec --url (séparés par des virgules)")
+    p.add_argument("--messages", type=int, default=100, help="clients /stream_messages (répartis sur les rôles)")
+    p.add_argument("--tweets", type=int, default=0, help="clients /stream_tweets")
+    p.add_argument("--animateurs", type=int, default=2, help="clients /stream_animateur")
+    p.add_argument("--ramp", type=float, default=5.0, help="étalement des connexions (s)")
+    p.add_argument("--duration", type=float, default=None, help="durée totale (défaut: fin du scénario + 5s)")
+    p.add_argument("--json", help="écrire le rapport JSON dans ce fichier")
+    args = p.parse_args(argv)
+    _raise_fd_limit()
+
+    proc = None
+    monitor = None
+    with tempfile.TemporaryDirectory(prefix="murail-loadtest-") as tmp:
+        start = time.time() + args.ramp + 3
+        if args.url:
+            u = urlsplit(args.url)
+            host, port = u.hostname, u.port or 80
+            roles = [r.strip() for r in args.roles.split(",") if r.strip()]
+            duration = args.duration or 60.0
+        else:
+            host, port = "127.0.0.1", args.port
+            chrono, pms = os.path.join(tmp, "chronogramme.csv"), os.path.join(tmp, "pms.csv")
+            if args.rows:
+                tweet_rows = args.rows if args.tweet_rows is None else args.tweet_rows
+                roles = synthetic_scenario(chrono, pms, args.rows, tweet_rows, args.n_roles, start, args.span)
+                span = args.span
+            else:
+                roles = rebase_workbook(args.scenario, chrono, start, args.speed)
+                pms = ""
+                with open(chrono, encoding="utf-8") as f:
+                    ats = [datetime.fromisoformat(r["horaire"]).timestamp()
+                           for r in csv.DictReader(f) if r.get("horaire")]
+                span = max(ats) - start
+            duration = args.duration or (start - time.time()) + span + 5
+            env = {
+                "PORT": str(port), "CHRONOGRAMME_FILE": chrono, "PMS_FILE": pms or os.path.join(tmp, "absent.csv"),
+                "ENABLE_PMS": "true" if pms else "false", "SCENARIO_CACHE_DIR": "", "JOURNAL_FILE": "",
+                "SCENARIO_WATCH_INTERVAL": "0", "PUBSUB_BACKEND": "memory", "DEBUG": "false",
+            }
+            print(f"Démarrage du serveur ({args.server}) sur le port {port}...")
+            proc = start_server(args.server, port, env, os.path.join(tmp, "server.log"))
+            if os.path.exists(f"/proc/{proc.pid}/stat"):
+                monitor = ProcessMonitor(proc.pid)
+            # The scenario was rebased before the boot: a slow start eats into the ramp
+            start_delay = start - time.time()
+            if start_delay < args.ramp:
+                print(f"Attention: le serveur a mis {args.ramp + 3 - start_delay:.1f}s à démarrer, "
+                      "les premiers éléments seront reçus en historique")
+
+        print(f"{args.messages} messagerie / {args.tweets} tweets / {args.animateurs} animateur, "
+              f"{len(roles)} rôle(s), {duration:.0f}s")
+        t0 = time.time()
+        try:
+            stats = asyncio.run(run_clients(args, host, port, roles, monitor, duration))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                try:
+                    proc.wait(5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        out = report(stats, monitor, time.time() - t0)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())